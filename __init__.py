@@ -4,52 +4,131 @@ from pathlib import Path
 
 import pyglet
 from pyglet import clock
-from pyglet.window import key, mouse
 import time
 import OpenGL.GL as gl
 import numpy as np
+import random
 import click
 
 from .simulation import BubbleSimulation
 from .renderer import MetaballRenderer
+from .camera import Camera
+from .interaction import InteractionController
+from .input_trace import InputRecorder
+from .alloc_profile import AllocationProfiler, print_report
+from .frame_pacing import FramePacer
+from .quality_governor import QualityGovernor
+from .event_log import EventLog, ConsoleSink, create_sink
+from .streaming import serve_headless, run_viewer
 
 
 @click.command("bubble_simulator", short_help='Metaball Bubble Simulator')
 @click.option("--width", type=int, default=1200, help="Window width")
 @click.option("--height", type=int, default=800, help="Window height")
-def bubble_simulator(width, height):
+@click.option("--world-width", type=int, default=None, help="World width (defaults to window width)")
+@click.option("--world-height", type=int, default=None, help="World height (defaults to window height)")
+@click.option("--offscreen-interval", type=int, default=1, help="Simulate off-screen bubbles every N frames")
+@click.option("--profile-alloc", is_flag=True, default=False, help="Track per-frame allocations (shown with S)")
+@click.option("--shared-memory", type=str, default=None, help="Publish the state to this shared memory segment")
+@click.option("--target-fps", type=float, default=None, help="Lower quality automatically to hold this frame rate")
+@click.option("--log", "log_sink", type=click.Choice(["console", "jsonl", "none"]), default="console", help="Where to write simulation events")
+@click.option("--log-file", type=click.Path(dir_okay=False), default="events.jsonl", help="File for the jsonl event log")
+@click.option("--physics", type=click.Choice(["python", "numpy"]), default="python", help="Physics backend")
+@click.option("--seed", type=int, default=None, help="Random seed")
+@click.option("--record", type=click.Path(dir_okay=False), default=None, help="Record an input trace to this file")
+@click.option("--serve", is_flag=True, default=False, help="Run without a window and stream the state over TCP")
+@click.option("--connect", type=str, default=None, help="Show the state streamed by a --serve instance at this host")
+@click.option("--port", type=int, default=8765, help="TCP port for --serve / --connect")
+@click.option("--stream-rate", type=float, default=30.0, help="Frames per second sent by --serve")
+def bubble_simulator(width, height, world_width=None, world_height=None, offscreen_interval=1, profile_alloc=False, shared_memory=None, target_fps=None, log_sink="console", log_file="events.jsonl", physics="python", seed=None, record=None, serve=False, connect=None, port=8765, stream_rate=30.0):
+
+    #modos en red: servidor sin ventana o visor de un servidor remoto
+    if serve:
+        serve_headless(world_width or width, world_height or height, port=port, rate=stream_rate, seed=seed, physics=physics)
+        return
+    if connect is not None:
+        run_viewer(connect, port, width, height)
+        return
+
+    #pyglet.window se conecta al display al importarse: se importa recién al abrir la
+    #ventana, así el paquete se puede importar sin display (tests, servidor headless)
+    from pyglet.window import key, mouse
+
+    #traducción de los símbolos de pyglet a los nombres que entiende InteractionController
+    KEY_ACTIONS = {
+        key.SPACE: "SPACE",
+        key.C: "C",
+        key.P: "P",
+        key.R: "R",
+        key.E: "E",
+        key.UP: "UP",
+        key.DOWN: "DOWN",
+        key.LEFT: "LEFT",
+        key.RIGHT: "RIGHT",
+    }
+    MOUSE_BUTTONS = {
+        mouse.LEFT: "LEFT",
+        mouse.RIGHT: "RIGHT",
+        mouse.MIDDLE: "MIDDLE",
+    }
 
     #Inicialización de la ventana y el estado
     window = pyglet.window.Window(width, height, caption="Metaball Bubble Simulator")
     
     #Variables de estado
     running = True
+
+    if record is not None and seed is None:
+        seed = random.randrange(2**31) #la traza necesita una semilla para ser reproducible
+    
+    #el mundo puede ser más grande que la ventana, la cámara decide qué se ve
+    world_width = world_width or width
+    world_height = world_height or height
     
-    simulation = BubbleSimulation(width, height)
+    simulation = BubbleSimulation(world_width, world_height, seed=seed, physics=physics)
+    simulation.offscreen_interval = offscreen_interval
+    simulation.events.add_sink(create_sink(log_sink, log_file))
+    simulation.events.start()
     renderer = MetaballRenderer(width, height)
+    camera = Camera(width, height, world_width, world_height)
+
+    if shared_memory is not None:
+        simulation.enable_shared_state(shared_memory, capacity=max(1024, simulation.max_bubbles * 2))
+        print(f"Estado publicado en memoria compartida: {shared_memory}")
+
+    #modo de instrumentación de memoria: un frame va desde update hasta el fin de on_draw
+    profiler = None
+    if profile_alloc:
+        profiler = AllocationProfiler()
+        profiler.start()
+        simulation.profiler = profiler
+        renderer.profiler = profiler
+
+    recorder = InputRecorder(simulation) if record is not None else None
+    controller = InteractionController(simulation, recorder)
     
     start_time = time.time()
     fps = 60
+    pacer = FramePacer(active_fps=fps, idle_fps=4)
+
+    #calidad adaptativa opcional según el tiempo medido de update y render
+    governor = QualityGovernor(simulation, renderer, target_fps) if target_fps else None
+
+    #las estadísticas (tecla S) van siempre a la consola, sin límite de tasa e
+    #independientes de --log; se escriben desde su propio hilo como los eventos
+    stats_log = EventLog(capacity=64)
+    stats_log.add_sink(ConsoleSink(kinds=("info",), rate_limit=None))
+    stats_log.start()
+    if governor is not None and recorder is not None: #los cambios de nivel van a la traza
+        governor.on_change = lambda level: recorder.record("quality", controller.frame_count, arg=level)
     
     show_stats = False
-    paused = False
-    mouse_pressed = False
-    mouse_x = 0
-    mouse_y = 0
+    last_stats_time = 0.0
     
-    frame_count = 0
     fps_history = []
 
-    continuous_spawn = False
-    spawn_timer = 0
-
     #Funciones auxiliares
 
-    def add_initial_bubbles():
-        #añade burbujas iniciales a la simulación
-        for _ in range(12):
-            simulation.add_bubble()
-
     def print_help():
         #muestra comandos de la simulación
         print("\n" + "="*50)
@@ -60,6 +139,8 @@ def bubble_simulator(width, height):
         print("   Right Click:   Explosión de burbujas")
         print("   Mouse Drag:    Barrido de burbujas")
         print("   Mouse Move:    Repele a las burbujas")
+        print("   Middle Drag:   Mueve la cámara")
+        print("   Scroll:        Zoom de la cámara")
         print()
         print("KEYBOARD CONTROLS:")
         print("   SPACE:         Añade 8 burbujas aleatorias")
@@ -67,7 +148,8 @@ def bubble_simulator(width, height):
         print("   P:             Pausa/Reanuda la simulación")
         print("   S:             Muestra estadísticas")
         print("   R:             Resetear simulación")
-        print("   E:             Explosión de burbujas en el centro")
+        print("   E:             Explosión de burbujas en el centro de la vista")
+        print("   F:             Resetear cámara")
         print()
         print("MOUSE REPULSION CONTROLS:")
         print("   UP/DOWN:       Aumentar/Disminuir fuerza de repulsión")
@@ -82,126 +164,123 @@ def bubble_simulator(width, height):
         print("="*50 + "\n")
 
     def print_stats():
-        #muestra estadísticas actuales
+        #muestra estadísticas actuales (un solo evento, se escribe fuera de este hilo)
+        lines = []
+        out = lines.append
         stats = simulation.get_simulation_stats()
         avg_fps = sum(fps_history) / len(fps_history) if fps_history else 0
         
-        print(f"\n{'='*30}")
-        print(f"   Estadísticas")
-        print(f"{'='*30}")
-        print(f"Burbujas:        {stats['total burbujas']:3d} / {simulation.max_bubbles}")
-        print(f"Radio promedio:     {stats['radio promedio']:6.1f}")
-        print(f"Rapidez promedio:      {stats['rapidez promedio']:6.1f}")
-        print(f"Energía total:   {stats['energía total']:6.1f}")
-        print(f"FPS:            {avg_fps:6.1f}")
-        print(f"Frame:          {frame_count:6d}")
-        print(f"Status:         {'PAUSED' if paused else 'RUNNING'}")
-        print(f"Mouse Pos:      ({mouse_x:6.1f}, {mouse_y:6.1f})")
-        print(f"Repulsion:      {simulation.mouse_repulsion_strength:.0f}")
-        print(f"Radio repulsión:    {simulation.mouse_repulsion_radius:.0f}")
-        print(f"{'='*30}\n")
+        out(f"\n{'='*30}")
+        out(f"   Estadísticas")
+        out(f"{'='*30}")
+        out(f"Burbujas:        {stats['total burbujas']:3d} / {simulation.max_bubbles}")
+        out(f"Visibles:        {renderer.visible_count:3d} (ocultas {renderer.culled_count})")
+        out(f"Fuera de foco:   {simulation.skipped_offscreen:3d} (sin simular este frame)")
+        out(f"Zoom:           {camera.zoom:6.2f}")
+        out(f"Radio promedio:     {stats['radio promedio']:6.1f}")
+        out(f"Rapidez promedio:      {stats['rapidez promedio']:6.1f}")
+        out(f"Energía total:   {stats['energía total']:6.1f}")
+        out(f"Despiertas:      {stats['burbujas despiertas']:3d} (dormidas {stats['burbujas dormidas']}, islas {stats['islas']})")
+        out(f"Ciclo de vida:   {stats['eventos programados']:3d} eventos programados")
+        out(f"FPS:            {avg_fps:6.1f}")
+        pacing = pacer.get_stats()
+        out(f"Modo:           {pacing['modo']} ({pacing['updates por segundo']:.0f} updates/s)")
+        out(f"Renders/s:      {pacing['renders por segundo']:6.1f} (omitidos {pacing['frames omitidos']})")
+        out(f"CPU:            {pacing['cpu %']:5.1f}%")
+        out(f"Frame:          {controller.frame_count:6d}")
+        out(f"Status:         {'PAUSED' if controller.paused else 'RUNNING'}")
+        out(f"Mouse Pos:      ({controller.mouse_x:6.1f}, {controller.mouse_y:6.1f})")
+        out(f"Repulsion:      {simulation.mouse_repulsion_strength:.0f}")
+        out(f"Radio repulsión:    {simulation.mouse_repulsion_radius:.0f}")
+        events = simulation.events.get_stats()
+        out(f"Eventos:        {events['eventos emitidos']:6d} (descartados {events['eventos descartados']})")
+        if events['errores de sinks']:
+            out(f"  errores de sinks: {events['errores de sinks']} (último: {events['último error']})")
+        out(f"{'='*30}\n")
+
+        if governor is not None:
+            quality = governor.get_stats()
+            out(f"Calidad:        nivel {quality['nivel']}/{quality['niveles']} "
+                f"({quality['frame ms']:.1f} ms, objetivo {quality['objetivo ms']:.1f} ms)")
+            out(f"  update/render: {quality['update ms']:.1f} / {quality['render ms']:.1f} ms")
+            if quality['perillas']:
+                out("  perillas:      " + ", ".join(f"{k}={v}" for k, v in quality['perillas'].items()))
+            for when, old, new, frame_time in quality['decisiones'][-3:]:
+                out(f"  {time.strftime('%H:%M:%S', time.localtime(when))} nivel {old} -> {new} ({frame_time * 1000:.1f} ms)")
+
+        if profiler is not None:
+            print_report(profiler.get_report(last=60), out)
+
+        stats_log.emit("info", simulation.frame_index, message="\n".join(lines))
 
   
+    def reschedule_update(): #aplica la frecuencia de update que indica el pacer
+        clock.unschedule(update)
+        clock.schedule_interval(update, pacer.get_update_interval())
+
+    def on_input(): #cualquier input redibuja y sale del modo inactivo al instante
+        pacer.request_redraw()
+        if pacer.set_idle(False):
+            reschedule_update()
+
     #Registro de eventos de la ventana
 
     @window.event
     def on_mouse_motion(x, y, dx, dy):
-        nonlocal mouse_x, mouse_y
-        mouse_x = x
-        mouse_y = y
-        simulation.update_mouse_position(x, y)
+        on_input()
+        controller.mouse_motion(*camera.screen_to_world(x, y))
     
     @window.event
     def on_mouse_press(x, y, button, modifiers):
-        nonlocal mouse_pressed, mouse_x, mouse_y
-        mouse_pressed = True
-        mouse_x = x
-        mouse_y = y
-        
-        simulation.update_mouse_position(x, y)
-        
-        if button == mouse.LEFT:
-            bubble_exploded = simulation.explode_bubble_at_position(x, y)
-            if bubble_exploded:
-                print("Burbuja explotada!")
-            else:
-                simulation.add_bubble_at_mouse(x, y)
-                print("Nueva burbuja añadida")
-                
-        elif button == mouse.RIGHT:
-            simulation.add_bubble_explosion(x, y, 10)
-            print("Explosión de burbujas!")
+        on_input()
+        if button in MOUSE_BUTTONS:
+            controller.mouse_press(*camera.screen_to_world(x, y), MOUSE_BUTTONS[button])
     
     @window.event
     def on_mouse_release(x, y, button, modifiers):
-        nonlocal mouse_pressed, continuous_spawn
-        mouse_pressed = False
-        continuous_spawn = False
+        on_input()
+        if button in MOUSE_BUTTONS:
+            controller.mouse_release(*camera.screen_to_world(x, y), MOUSE_BUTTONS[button])
     
     @window.event
     def on_mouse_drag(x, y, dx, dy, buttons, modifiers):
-        nonlocal mouse_x, mouse_y, continuous_spawn, frame_count
-        mouse_x = x
-        mouse_y = y
-        
-        simulation.update_mouse_position(x, y)
-        
-        if buttons & mouse.LEFT:
-            continuous_spawn = True
-            
-            if frame_count % 3 == 0:
-                if not simulation.explode_bubble_at_position(x, y):
-                    simulation.add_bubble_at_mouse(x, y)
+        on_input()
+        if buttons & mouse.MIDDLE:
+            camera.pan(dx, dy)
+        controller.mouse_drag(*camera.screen_to_world(x, y), {name for b, name in MOUSE_BUTTONS.items() if buttons & b})
+
+    @window.event
+    def on_mouse_scroll(x, y, scroll_x, scroll_y):
+        on_input()
+        camera.zoom_at(1.1 ** scroll_y, x, y)
     
     @window.event
     def on_key_press(symbol, modifiers):
-        nonlocal paused, show_stats
+        nonlocal show_stats
+        on_input()
         
-        if symbol == key.SPACE:
-            for _ in range(8):
-                simulation.add_bubble()
-                
-        elif symbol == key.C:
-            simulation.clear_bubbles()
-            print("Burbujas eliminadas")
-            
-        elif symbol == key.P:
-            paused = not paused
-            print(f"Simulación {'pausada' if paused else 'reanudada'}")
+        if symbol in KEY_ACTIONS:
+            #E explota en el centro de lo que se ve, no en el del mundo
+            controller.key_press(KEY_ACTIONS[symbol], *camera.screen_to_world(width / 2, height / 2))
             
         elif symbol == key.S:
             show_stats = not show_stats
             print(f"Estadísticas {'habilitadas' if show_stats else 'deshabilitadas'}")
             
-        elif symbol == key.R:
-            simulation.clear_bubbles()
-            add_initial_bubbles()
-            print("Reseteo de la simulación")
-            
-        elif symbol == key.E:
-            center_x, center_y = window.width // 2, window.height // 2
-            simulation.add_bubble_explosion(center_x, center_y, 15)
-            print("Explosión en el centro!")
-            
-        elif symbol == key.UP:
-            simulation.mouse_repulsion_strength *= 1.2
-            print(f"Fuerza de repulsión: {simulation.mouse_repulsion_strength:.0f}")
-            
-        elif symbol == key.DOWN:
-            simulation.mouse_repulsion_strength *= 0.8
-            print(f"Fuerza de repulsión: {simulation.mouse_repulsion_strength:.0f}")
-            
-        elif symbol == key.LEFT:
-            simulation.mouse_repulsion_radius = max(50, simulation.mouse_repulsion_radius * 0.8)
-            print(f"Radio de repulsión: {simulation.mouse_repulsion_radius:.0f}")
-            
-        elif symbol == key.RIGHT:
-            simulation.mouse_repulsion_radius = min(400, simulation.mouse_repulsion_radius * 1.2)
-            print(f"Radio de repulsión: {simulation.mouse_repulsion_radius:.0f}")
+        elif symbol == key.F:
+            camera.reset()
             
         elif symbol == key.H:
             print_help()
 
+    @window.event
+    def on_expose():
+        pacer.request_redraw()
+
+    @window.event
+    def on_resize(width, height):
+        pacer.request_redraw()
+
     @window.event
     def on_close():
         nonlocal running
@@ -209,40 +288,64 @@ def bubble_simulator(width, height):
         
         #Desprograma la función de actualización
         clock.unschedule(update) 
+
+        if profiler is not None:
+            profiler.stop()
+
+        simulation.disable_shared_state()
+        simulation.events.stop()
+        stats_log.stop()
+
+        if recorder is not None:
+            recorder.save(record)
+            print(f"Traza de entrada guardada en {record} (seed {seed})")
         
         #Sale explícitamente de la aplicación Pyglet
         pyglet.app.exit()
 
     #Función de actualización
     def update(dt):
-        nonlocal running, paused, mouse_x, mouse_y, continuous_spawn, spawn_timer, frame_count, fps_history
+        nonlocal running, fps_history, last_stats_time
         if not running:
             return
             
-        dt = min(dt, 1/30.0)
-        
-        simulation.update_mouse_position(mouse_x, mouse_y)
+        if profiler is not None:
+            profiler.end_frame()
+            profiler.begin_frame()
+
+        controller.set_focus(camera.get_bounds())
+        update_start = time.perf_counter()
+        dt = controller.update(dt, catch_up=pacer.idle) #en reposo el tiempo simulado sigue al real
+        update_time = time.perf_counter() - update_start
         
-        if not paused:
-            simulation.update(dt)
-            
-            if continuous_spawn:
-                spawn_timer += dt
-                if spawn_timer > 0.05:
-                    if simulation.get_bubble_count() < simulation.max_bubbles:
-                        simulation.add_bubble_at_mouse(mouse_x, mouse_y)
-                    spawn_timer = 0
-            
-        frame_count += 1
         current_fps = 1.0 / dt if dt > 0 else 0
         fps_history.append(current_fps)
         
         if len(fps_history) > 60:
             fps_history.pop(0)
+
+        #pausado o sin nada que simular: bajar la frecuencia hasta el próximo input
+        idle = controller.paused or (simulation.get_bubble_count() == 0 and not controller.continuous_spawn)
+        if pacer.set_idle(idle):
+            reschedule_update()
+
+        #solo se dibuja si algo cambió, si no queda en pantalla el último frame
+        render_time = 0.0
+        if pacer.should_render(simulation.consume_dirty()):
+            render_start = time.perf_counter()
+            window.draw(dt)
+            render_time = time.perf_counter() - render_start
+
+        if governor is not None and not pacer.idle:
+            governor.record(update_time, render_time, dt)
+
+        if show_stats and time.time() - last_stats_time >= 1.0: #para que no se sature, mostramos cada segundo
+            last_stats_time = time.time()
+            print_stats()
     
     @window.event
     def on_draw():
-        nonlocal running, frame_count, show_stats, start_time
+        nonlocal running, show_stats, start_time
         
         if not running:
             return
@@ -252,10 +355,7 @@ def bubble_simulator(width, height):
             
             current_time = time.time() - start_time
             
-            renderer.render(simulation.bubbles, current_time)
-            
-            if show_stats and frame_count % 60 == 0: #para que no se sature, mostramos cada segundo
-                print_stats()
+            renderer.render(simulation.bubbles, current_time, camera)
                 
         except gl.GLError as e:
             # Captura errores OpenGL, si la aplicación todavía se considera "corriendo"
@@ -267,14 +367,15 @@ def bubble_simulator(width, height):
     #Inicio de la aplicación
     
     #Agregar burbujas iniciales al inicio
-    add_initial_bubbles()
+    controller.add_initial_bubbles()
     
-    #Programar la función de actualización
-    clock.schedule_interval(update, 1/fps) # 60 FPS
+    #Programar la función de actualización (60 FPS, menos si está inactiva)
+    clock.schedule_interval(update, pacer.get_update_interval())
     
     print("Bubble Simulator iniciado!")
     print("Presiona H para acceder a help")
     print("-" * 50)
     print_help() #Muestra la ayuda al inicio
 
-    pyglet.app.run()
+    #sin intervalo: los redibujos los decide update a través del pacer
+    pyglet.app.run(None)
@@ -1,4 +1,4 @@
 from . import bubble_simulator
 
 if __name__ == "__main__":
-    bubble_simulator.callback(1200, 800)
\ No newline at end of file
+    bubble_simulator(prog_name="bubble_simulator")
\ No newline at end of file
@@ -0,0 +1,191 @@
+import gc
+import sys
+import tracemalloc
+
+import numpy as np
+
+
+#Instrumentación de memoria por frame, basada en tracemalloc.
+#
+#BubbleSimulation.update y MetaballRenderer.render llaman a profiler.switch(etapa)
+#cuando tienen un profiler asignado (si es None no hay costo extra). Por cada etapa
+#se acumula, en cada entrada:
+#   - bytes asignados: pico de memoria sobre el valor al entrar (temporales incluidos)
+#   - bytes netos: diferencia de memoria al salir
+#   - bloques netos: diferencia de bloques vivos del allocator de Python (sys.getallocatedblocks)
+#Además se cuentan las recolecciones del GC que ocurren durante el frame.
+
+STANDARD_SCENARIOS = ("calma", "densa", "explosiones")
+
+#presupuesto de bytes asignados por frame, por escenario y etapa (~2x lo medido)
+DEFAULT_BUDGETS = {
+    "calma": {"fuerzas": 8 * 1024, "integración": 16 * 1024, "total": 24 * 1024},
+    "densa": {"fuerzas": 80 * 1024, "integración": 192 * 1024, "total": 256 * 1024},
+    "explosiones": {"fuerzas": 104 * 1024, "integración": 164 * 1024, "total": 272 * 1024},
+}
+
+
+class AllocationBudgetError(AssertionError): #algún escenario superó su presupuesto
+    pass
+
+
+class AllocationProfiler: #mide bytes/bloques asignados por frame y por etapa
+
+    def __init__(self, history=600):
+        self.history = history
+        self.frames = []
+        self._stage = None
+        self._frame = None
+        self._stage_start = 0
+        self._stage_blocks = 0
+        self._gc_collections = 0
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        gc.callbacks.append(self._on_gc)
+
+    def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_collections += 1
+
+    def begin_frame(self):
+        self._frame = {}
+        self._gc_collections = 0
+
+    def end_frame(self): #cierra el frame y lo agrega al historial
+        self.switch(None)
+        frame = self._frame
+        self._frame = None
+        if frame is None:
+            return None
+        frame["gc"] = self._gc_collections
+        self.frames.append(frame)
+        if len(self.frames) > self.history:
+            self.frames.pop(0)
+        return frame
+
+    def switch(self, stage): #termina la etapa actual y comienza otra (None para solo terminar)
+        if self._stage is not None and self._frame is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            blocks = sys.getallocatedblocks()
+            totals = self._frame.setdefault(self._stage, [0, 0, 0, 0])
+            totals[0] += max(peak - self._stage_start, 0)
+            totals[1] += current - self._stage_start
+            totals[2] += blocks - self._stage_blocks
+            totals[3] += 1
+
+        self._stage = stage if self._frame is not None else None
+        if self._stage is not None:
+            tracemalloc.reset_peak()
+            self._stage_start = tracemalloc.get_traced_memory()[0]
+            self._stage_blocks = sys.getallocatedblocks()
+
+    def get_report(self, last=None): #promedios por frame de cada etapa
+        frames = self.frames[-last:] if last else self.frames
+        if not frames:
+            return {}
+        stages = sorted({name for frame in frames for name in frame if name != "gc"})
+        report = {}
+        for name in stages:
+            values = np.array([frame.get(name, [0, 0, 0, 0]) for frame in frames], dtype=float)
+            report[name] = {
+                'bytes asignados': values[:, 0].mean(),
+                'bytes netos': values[:, 1].mean(),
+                'bloques netos': values[:, 2].mean(),
+                'entradas': values[:, 3].mean(),
+            }
+        report['total'] = {
+            'bytes asignados': sum(r['bytes asignados'] for r in report.values()),
+            'bytes netos': sum(r['bytes netos'] for r in report.values()),
+            'bloques netos': sum(r['bloques netos'] for r in report.values()),
+            'gc por frame': float(np.mean([frame["gc"] for frame in frames])),
+        }
+        return report
+
+
+def print_report(report, out=print): #muestra un reporte de AllocationProfiler.get_report
+    out(f"\n{'='*56}")
+    out(f"   Asignaciones por frame")
+    out(f"{'='*56}")
+    out(f"{'Etapa':<16}{'asignados':>14}{'netos':>14}{'bloques':>12}")
+    for name, values in report.items():
+        if name == 'total':
+            continue
+        out(f"{name:<16}{values['bytes asignados']:>14.0f}{values['bytes netos']:>14.0f}{values['bloques netos']:>12.1f}")
+    total = report.get('total')
+    if total:
+        out(f"{'total':<16}{total['bytes asignados']:>14.0f}{total['bytes netos']:>14.0f}{total['bloques netos']:>12.1f}")
+        out(f"GC por frame:   {total['gc por frame']:.2f}")
+    out(f"{'='*56}\n")
+
+
+def setup_scenario(name, seed=0, physics="python"): #simulación en el estado inicial de un escenario estándar
+    from .simulation import BubbleSimulation
+
+    simulation = BubbleSimulation(1200, 800, seed=seed, physics=physics)
+    if name == "calma":
+        simulation.spawn_pattern("scatter", 12)
+    elif name == "densa":
+        simulation.spawn_pattern("scatter", simulation.max_bubbles)
+    elif name == "explosiones":
+        simulation.spawn_pattern("scatter", 40)
+    else:
+        raise ValueError(f"Escenario desconocido: {name}")
+    return simulation
+
+
+def profile_scenario(name, frames=120, warmup=30, seed=0): #corre un escenario estándar sin ventana
+    simulation = setup_scenario(name, seed)
+    dt = 1.0 / 60
+
+    for _ in range(warmup):
+        simulation.update(dt)
+
+    profiler = AllocationProfiler(history=frames)
+    simulation.profiler = profiler
+    profiler.start()
+    try:
+        for frame in range(frames):
+            profiler.begin_frame()
+            if name == "explosiones" and frame % 10 == 0:
+                profiler.switch("explosión")
+                simulation.add_bubble_explosion(600, 400, 10)
+            simulation.update(dt)
+            profiler.end_frame()
+    finally:
+        profiler.stop()
+        simulation.profiler = None
+
+    return profiler.get_report()
+
+
+def check_allocation_budgets(budgets=None, frames=120, seed=0): #retorna los presupuestos superados
+    budgets = DEFAULT_BUDGETS if budgets is None else budgets
+    failures = []
+    for scenario, limits in budgets.items():
+        report = profile_scenario(scenario, frames=frames, seed=seed)
+        for stage, limit in limits.items():
+            allocated = report.get(stage, {}).get('bytes asignados', 0)
+            if allocated > limit:
+                failures.append((scenario, stage, allocated, limit))
+    return failures
+
+
+def assert_allocation_budgets(budgets=None, frames=120, seed=0): #para usar desde CI
+    failures = check_allocation_budgets(budgets, frames, seed)
+    if failures:
+        lines = [
+            f"{scenario}/{stage}: {allocated:.0f} bytes por frame (presupuesto {limit})"
+            for scenario, stage, allocated, limit in failures
+        ]
+        raise AllocationBudgetError("Presupuesto de asignaciones superado:\n" + "\n".join(lines))
@@ -1,10 +1,20 @@
-import time
+import itertools
 import numpy as np
 
 
+#constantes del loop de física, creadas una sola vez (no en cada frame)
+FLOTAGE_FORCE = np.array([0.0, 80.0]) #fuerza de "flotabilidad", para dinamismo
+COS45 = np.sqrt(2) / 2
+SIN45 = np.sqrt(2) / 2
+ROTATE_45_UP = np.array([[COS45, -SIN45], [SIN45, COS45]])
+ROTATE_45_DOWN = np.array([[COS45, SIN45], [-SIN45, COS45]])
+
+
 class Bubble:
     #clase que representa a las burbujas en la simulación :)
 
+    _id_counter = itertools.count(1) #ids estables, nunca se reutilizan
+
     def __init__(
         self,
         radius,
@@ -15,17 +25,18 @@ class Bubble:
         mode="split", #se divide
         density=400.0,
         color=None,
+        lifetime=None,
     ):
         #iniciar una "instancia" de burbuja
+        self.id = next(Bubble._id_counter)
         self.max_speed = max_speed
         self.position = position.copy()
         self.speed = speed.copy()
         self.radius = radius
         self.min_radius = min_radius
 
-        self.t0 = time.time()
-        self.t = time.time()
-        self.last_split_time = time.time()
+        self.last_split_age = 0.0 #edad (tiempo simulado) de la última división
+        self.can_split = False #lo habilita el LifecycleScheduler tras la gracia/espera
 
         self.mode = mode
         self.to_split = False
@@ -36,8 +47,13 @@ class Bubble:
         self.set_resistance()
 
         #propiedades de la burbuja
-        self.lifetime = np.random.uniform(60, 120)
+        self.lifetime = lifetime if lifetime is not None else np.random.uniform(60, 120)
         self.age = 0
+        self.pending_dt = 0.0 #tiempo acumulado sin simular (burbujas fuera de pantalla)
+
+        #islas dormidas (ver BubbleSimulation.update_islands)
+        self.sleeping = False
+        self.calm_time = 0.0
         self.base_radius = radius
         
         #propiedades visuales para la metaball/burbuja
@@ -78,20 +94,19 @@ class Bubble:
         if speed_mag > self.max_speed:
             self.speed = (self.speed / speed_mag) * self.max_speed
 
-    def update_pos(self, bubbles, dt): #actualiza posición de la partícula
+    def update_pos(self, bubbles, dt, turbulence_scale=1.0, split_chance=0.3, collide=True): #actualiza posición de la partícula
         #actualiza edad
         self.age += dt
         
         #fuerza de "flotabilidad", para dinamismo
-        flotage_force = np.array([0, 80])
-        self.speed += flotage_force * dt / self.weight
+        self.speed += FLOTAGE_FORCE * (dt / self.weight)
         
         #turbulencia para más dinamismo
         turbulence = np.array([
             np.random.uniform(-20, 20),
             np.random.uniform(-10, 10)
         ])
-        self.speed += turbulence * dt
+        self.speed += turbulence * (dt * turbulence_scale)
         
         #fuerza de arrastre (para que no aceleren infinitamente)
         drag_coefficient = 0.05
@@ -102,13 +117,13 @@ class Bubble:
         new_position = self.position + dt * self.speed
 
         #chequear colisiones con otras burbujas
-        if self.mode != "overlap":
+        if collide and self.mode != "overlap":
             for other in bubbles:
                 if other != self:
                     distance = np.linalg.norm(new_position - other.position)
                     if distance <= (self.radius + other.radius):
                         #burbujas colisionando
-                        self.handle_collision(other, distance)
+                        self.handle_collision(other, distance, split_chance)
 
         #actualizar posición pos-colisiones
         self.position = new_position
@@ -117,12 +132,23 @@ class Bubble:
         age_factor = max(0.3, 1.0 - (self.age / self.lifetime))  #30% fuerza como min
         self.metaball_strength = self.base_radius * self.base_radius * age_factor * 2
         
-        #condiciones supervivencia
-        return (self.age < self.lifetime and 
-                self.radius > self.min_radius and 
+        #condiciones supervivencia (la expiración por edad la agenda el LifecycleScheduler)
+        return (self.radius > self.min_radius and 
                 np.linalg.norm(self.speed) < self.max_speed * 2)
 
-    def handle_collision(self, other, distance): #maneja colisiones entre burbujas
+    def update_asleep(self, dt): #burbuja dormida: sin física, deriva con su isla y sigue envejeciendo
+        self.position = self.position + self.speed * dt
+        self.age += dt
+        age_factor = max(0.3, 1.0 - (self.age / self.lifetime))
+        self.metaball_strength = self.base_radius * self.base_radius * age_factor * 2
+        return self.radius > self.min_radius
+
+    def wake(self):
+        self.sleeping = False
+        self.calm_time = 0.0
+        self.speed = self.speed.copy() #dormida comparte la velocidad de deriva de su isla
+
+    def handle_collision(self, other, distance, split_chance=0.3): #maneja colisiones entre burbujas
         if distance == 0:
             return
             
@@ -155,9 +181,8 @@ class Bubble:
                     if (
                         b.radius > b.min_radius * 3  #radio min para dividirse
                         and b.remaining_energy < b.resistance * 0.5 #poca energía
-                        and time.time() - b.t0 > 1.0  #periodo de "gracia" inicial
-                        and time.time() - b.last_split_time > 2.0  #periodo entre divisiones
-                        and np.random.random() < 0.3  #división ocurre con 30% de prob
+                        and b.can_split  #periodos de gracia y entre divisiones (ver lifecycle.py)
+                        and np.random.random() < split_chance  #división ocurre con 30% de prob (por defecto)
                     ):
                         b.to_split = True
 
@@ -165,17 +190,11 @@ class Bubble:
             other.speed = new_speed_b
 
     def split(self): #divide la burbuja en 2
-        self.last_split_time = time.time()
+        self.last_split_age = self.age
 
         #calcular propiedades de las nuevas burbujas
         new_radius = self.radius / 1.4
         
-        #matrices de rotación, se alejan en direcciones opuestas
-        cos45 = np.sqrt(2) / 2
-        sin45 = np.sqrt(2) / 2
-        rotate_45_up = np.array([[cos45, -sin45], [sin45, cos45]])
-        rotate_45_down = np.array([[cos45, sin45], [-sin45, cos45]])
-
         #vector perpendicular al vector velocidad
         if np.linalg.norm(self.speed) > 0:
             perp_vector = np.array([self.speed[1], -self.speed[0]])
@@ -195,7 +214,7 @@ class Bubble:
         new_bubble = Bubble(
             radius=new_radius,
             position=self.position + offset,
-            speed=np.dot(rotate_45_up, self.speed) + split_velocity,
+            speed=np.dot(ROTATE_45_UP, self.speed) + split_velocity,
             min_radius=self.min_radius,
             max_speed=self.max_speed,
             mode=self.mode,
@@ -208,7 +227,7 @@ class Bubble:
         self.base_radius = new_radius
         self.position = self.position - offset
         self.remaining_energy = self.energy * 0.8 #se restaura para que no se divida automáticamente
-        self.speed = np.dot(rotate_45_down, self.speed) - split_velocity
+        self.speed = np.dot(ROTATE_45_DOWN, self.speed) - split_velocity
         self.set_weight()
         self.set_resistance()
 
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class Camera: #vista sobre el mundo: centro en coordenadas de mundo + zoom
+
+    def __init__(self, viewport_width, viewport_height, world_width=None, world_height=None, min_zoom=0.1, max_zoom=8.0):
+        self.viewport_width = viewport_width
+        self.viewport_height = viewport_height
+        self.world_width = world_width if world_width is not None else viewport_width
+        self.world_height = world_height if world_height is not None else viewport_height
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.reset()
+
+    def reset(self): #centra la cámara en el mundo, sin zoom
+        self.center = np.array([self.world_width / 2, self.world_height / 2], dtype=float)
+        self.zoom = 1.0
+
+    def get_origin(self): #coordenada de mundo de la esquina inferior izquierda de la pantalla
+        half_view = np.array([self.viewport_width, self.viewport_height]) / (2 * self.zoom)
+        return self.center - half_view
+
+    def get_bounds(self): #(x_min, y_min, x_max, y_max) visibles, en coordenadas de mundo
+        x_min, y_min = self.get_origin()
+        return (
+            x_min,
+            y_min,
+            x_min + self.viewport_width / self.zoom,
+            y_min + self.viewport_height / self.zoom,
+        )
+
+    def screen_to_world(self, x, y):
+        origin = self.get_origin()
+        return origin[0] + x / self.zoom, origin[1] + y / self.zoom
+
+    def world_to_screen(self, positions): #acepta un punto (2,) o un array (N, 2)
+        return (np.asarray(positions, dtype=float) - self.get_origin()) * self.zoom
+
+    def pan(self, dx, dy): #desplaza la vista según un movimiento en pixeles de pantalla
+        self.center -= np.array([dx, dy], dtype=float) / self.zoom
+
+    def zoom_at(self, factor, x, y): #zoom manteniendo fijo el punto de pantalla (x, y)
+        anchor = np.array(self.screen_to_world(x, y))
+        self.zoom = float(np.clip(self.zoom * factor, self.min_zoom, self.max_zoom))
+        #mover el centro para que anchor siga bajo el cursor
+        self.center = anchor - (np.array([x, y]) - np.array([self.viewport_width, self.viewport_height]) / 2) / self.zoom
@@ -0,0 +1,202 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+
+#Registro de eventos de la simulación sin I/O en el hilo principal.
+#
+#emit() solo agrega una tupla (seq, hora, frame, tipo, datos) a un buffer circular
+#(deque con maxlen: si se llena se pisan los más viejos y se cuentan como descartados).
+#Un hilo aparte vacía el buffer cada flush_interval segundos y lo escribe en los sinks.
+#Sin sinks, emit no hace nada (p.ej. en replays y benchmarks sin ventana).
+#Un error de un sink (I/O, evento mal formado) se cuenta y no detiene el hilo.
+
+EVENT_KINDS = ("spawn", "explode", "split", "expire", "clear", "param", "info")
+
+#texto de cada tipo para la consola
+EVENT_FORMATS = {
+    "spawn": "{count} burbuja(s) nueva(s) desde la {first_id}",
+    "explode": "Burbuja explotada en ({x:.0f}, {y:.0f})",
+    "split": "Burbuja {id} dividida (nueva {child})",
+    "expire": "Burbuja {id} eliminada ({reason})",
+    "clear": "Todas las burbujas han sido eliminadas",
+    "param": "{name}: {value}",
+    "info": "{message}",
+    "omitidos": "({total} eventos omitidos por límite de tasa: {detail})",
+}
+
+
+class EventSink: #destino de eventos, con límite de tasa opcional (eventos por segundo)
+
+    def __init__(self, kinds=None, rate_limit=None):
+        self.kinds = None if kinds is None else set(kinds)
+        self.rate_limit = rate_limit
+        self.written = 0
+        self._window_start = 0.0
+        self._window_count = 0
+        self._suppressed = {}
+
+    def write(self, events): #filtra, aplica el límite de tasa y escribe un lote
+        if self.kinds is not None:
+            events = [e for e in events if e[3] in self.kinds]
+
+        if self.rate_limit is not None:
+            now = time.time()
+            if now - self._window_start >= 1.0:
+                if self._suppressed: #resumen de lo omitido en el segundo anterior
+                    detail = ", ".join(f"{k}={n}" for k, n in self._suppressed.items())
+                    summary = (None, now, None, "omitidos", {"total": sum(self._suppressed.values()), "detail": detail})
+                    events = [summary] + events
+                    self._suppressed = {}
+                self._window_start = now
+                self._window_count = 0
+
+            allowed = max(self.rate_limit - self._window_count, 0)
+            for event in events[allowed:]:
+                self._suppressed[event[3]] = self._suppressed.get(event[3], 0) + 1
+            events = events[:allowed]
+            self._window_count += len(events)
+
+        if events:
+            self._write(events)
+            self.written += len(events)
+
+    def _write(self, events):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ConsoleSink(EventSink): #texto legible por stdout
+    #por defecto solo lo que antes se mostraba con print (sin spawn/split/expire de cada frame)
+
+    def __init__(self, kinds=("explode", "clear", "param", "info"), rate_limit=20):
+        super().__init__(kinds, rate_limit)
+
+    def _write(self, events):
+        lines = []
+        for seq, when, frame, kind, data in events:
+            try:
+                lines.append(EVENT_FORMATS[kind].format(**data))
+            except (KeyError, IndexError, ValueError): #faltan datos para el formato
+                lines.append(f"{kind}: {data}")
+        print("\n".join(lines), flush=True)
+
+
+class JsonLinesSink(EventSink): #un objeto JSON por línea, para procesar después
+
+    def __init__(self, path, kinds=None, rate_limit=None):
+        super().__init__(kinds, rate_limit)
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _write(self, events):
+        for seq, when, frame, kind, data in events:
+            record = {"seq": seq, "time": when, "frame": frame, "kind": kind}
+            record.update(data)
+            self.file.write(json.dumps(record, ensure_ascii=False, default=float) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def create_sink(name, path=None): #"console", "jsonl" o "none"
+    if name == "console":
+        return ConsoleSink()
+    if name == "jsonl":
+        if path is None:
+            raise ValueError("El sink jsonl necesita un archivo")
+        return JsonLinesSink(path)
+    if name == "none":
+        return None
+    raise ValueError(f"Sink de eventos desconocido: {name}")
+
+
+class EventLog: #buffer circular de eventos con vaciado asíncrono a los sinks
+
+    def __init__(self, capacity=4096, flush_interval=0.1):
+        self.buffer = deque(maxlen=capacity)
+        self.flush_interval = flush_interval
+        self.sinks = []
+        self.emitted = 0
+        self.dropped = 0  #pisados en el buffer antes de alcanzar a escribirse
+        self.flushed = 0
+        self.sink_errors = 0
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add_sink(self, sink):
+        if sink is not None:
+            self.sinks.append(sink)
+
+    def emit(self, kind, frame=None, **data): #barato: no hace I/O ni toma locks
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Tipo de evento desconocido: {kind}")
+        if not self.sinks:
+            return
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.emitted += 1
+        self.buffer.append((self.emitted, time.time(), frame, kind, data))
+
+    def flush(self): #escribe lo pendiente en los sinks (lo llama el hilo de vaciado)
+        events = []
+        buffer = self.buffer
+        while buffer:
+            try:
+                events.append(buffer.popleft())
+            except IndexError:
+                break
+        self.flushed += len(events)
+        for sink in self.sinks:
+            try:
+                sink.write(events)
+            except Exception as error: #un sink que falla no debe matar el hilo de vaciado
+                self.sink_errors += 1
+                if self.sink_errors == 1: #avisa solo la primera vez, el resto queda en las estadísticas
+                    print(f"Error en el sink {type(sink).__name__}: {error!r}", file=sys.stderr)
+                self.last_error = f"{type(sink).__name__}: {error!r}"
+
+    def start(self): #arranca el hilo de vaciado
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as error: #p.ej. un sink agregado mientras se vaciaba
+                self.sink_errors += 1
+                self.last_error = repr(error)
+
+    def stop(self): #detiene el hilo, escribe lo pendiente y cierra los sinks
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as error:
+                self.sink_errors += 1
+                self.last_error = f"{type(sink).__name__}: {error!r}"
+        self.sinks = []
+
+    def get_stats(self):
+        return {
+            'eventos emitidos': self.emitted,
+            'eventos descartados': self.dropped,
+            'eventos pendientes': len(self.buffer),
+            'eventos vaciados': self.flushed,
+            'errores de sinks': self.sink_errors,
+            'último error': self.last_error,
+        }
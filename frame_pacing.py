@@ -0,0 +1,58 @@
+import time
+
+
+class FramePacer: #decide cuándo redibujar y a qué frecuencia actualizar
+    #activo: update a active_fps y se dibuja solo si la simulación cambió (dirty).
+    #inactivo (pausado o mundo vacío): update baja a idle_fps hasta el próximo input.
+
+    def __init__(self, active_fps=60, idle_fps=4):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.idle = False
+        self.needs_redraw = True  #p.ej. tras un expose, resize o movimiento de cámara
+
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self._last_cpu = time.process_time()
+        self._last_wall = time.perf_counter()
+        self._last_rendered = 0
+        self._last_skipped = 0
+
+    def get_update_interval(self):
+        return 1.0 / (self.idle_fps if self.idle else self.active_fps)
+
+    def set_idle(self, idle): #retorna True si cambió el modo (hay que reprogramar update)
+        if idle == self.idle:
+            return False
+        self.idle = idle
+        return True
+
+    def request_redraw(self):
+        self.needs_redraw = True
+
+    def should_render(self, dirty): #registra y decide si este frame se dibuja
+        if dirty or self.needs_redraw:
+            self.needs_redraw = False
+            self.frames_rendered += 1
+            return True
+        self.frames_skipped += 1
+        return False
+
+    def get_stats(self): #uso de CPU y renders desde la llamada anterior
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        elapsed = max(wall - self._last_wall, 1e-9)
+
+        stats = {
+            'modo': 'inactivo' if self.idle else 'activo',
+            'updates por segundo': 1.0 / self.get_update_interval(),
+            'renders por segundo': (self.frames_rendered - self._last_rendered) / elapsed,
+            'frames omitidos': self.frames_skipped - self._last_skipped,
+            'cpu %': 100.0 * (cpu - self._last_cpu) / elapsed,
+        }
+
+        self._last_cpu = cpu
+        self._last_wall = wall
+        self._last_rendered = self.frames_rendered
+        self._last_skipped = self.frames_skipped
+        return stats
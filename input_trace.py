@@ -0,0 +1,210 @@
+import hashlib
+import json
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from .interaction import InteractionController, KEY_NAMES, BUTTON_NAMES
+from .simulation import BubbleSimulation
+from .quality_governor import QualityGovernor
+
+
+#Formato del archivo de trazas:
+#   magic "BSTR", versión u8, largo del header u32, header JSON (seed, tamaño y parámetros)
+#   y luego los eventos comprimidos con zlib, 27 bytes cada uno:
+#   tipo u8, frame u32, timestamp f32, x f64, y f64, arg i16
+#   (x e y en f64 para que el replay use exactamente el mismo dt que la sesión grabada)
+#
+#En los eventos "frame" x es el dt que recibió update y arg si fue con catch_up;
+#en "key" arg es el índice en KEY_NAMES y x, y el centro de la vista; en
+#"press"/"release" arg es el índice en BUTTON_NAMES, en "drag" una máscara y en
+#"quality" el nivel de QualityGovernor que se aplicó después de ese frame.
+#"focus" graba la región visible cuando cambia: arg 0 trae (x_min, y_min), arg 1
+#(x_max, y_max) y arg -1 que no hay región
+
+TRACE_MAGIC = b"BSTR"
+TRACE_VERSION = 2
+
+EVENT_KINDS = ("frame", "motion", "press", "release", "drag", "key", "quality", "focus")
+
+_PREAMBLE = struct.Struct("<4sBI")
+EVENT_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("frame", "<u4"),
+    ("time", "<f4"),
+    ("x", "<f8"),
+    ("y", "<f8"),
+    ("arg", "<i2"),
+])
+
+#parámetros de la simulación que se guardan con la traza
+TRACE_PARAMS = (
+    "max_bubbles",
+    "spawn_rate",
+    "mouse_repulsion_strength",
+    "mouse_repulsion_radius",
+    "offscreen_interval",
+    "focus_margin",
+)
+
+
+class InputTrace: #eventos de entrada grabados + lo necesario para reproducirlos
+
+    def __init__(self, seed, width, height, params=None, events=None):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.params = dict(params or {})
+        self.events = events if events is not None else np.empty(0, dtype=EVENT_DTYPE)
+
+    def get_frame_count(self):
+        return int(np.count_nonzero(self.events["kind"] == EVENT_KINDS.index("frame")))
+
+    def save(self, path):
+        header = json.dumps({
+            "seed": self.seed,
+            "width": self.width,
+            "height": self.height,
+            "params": self.params,
+        }).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_PREAMBLE.pack(TRACE_MAGIC, TRACE_VERSION, len(header)))
+            f.write(header)
+            f.write(zlib.compress(self.events.tobytes()))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, header_len = _PREAMBLE.unpack_from(data, 0)
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"{path} no es una traza de entrada")
+        if version != TRACE_VERSION:
+            raise ValueError(f"Versión de traza no soportada: {version}")
+
+        start = _PREAMBLE.size
+        header = json.loads(data[start:start + header_len].decode("utf-8"))
+        events = np.frombuffer(zlib.decompress(data[start + header_len:]), dtype=EVENT_DTYPE).copy()
+        return cls(header["seed"], header["width"], header["height"], header["params"], events)
+
+
+class InputRecorder: #graba los eventos que pasan por un InteractionController
+
+    def __init__(self, simulation):
+        self.trace = InputTrace(
+            simulation.seed,
+            simulation.width,
+            simulation.height,
+            {name: getattr(simulation, name) for name in TRACE_PARAMS},
+        )
+        self.trace.params["physics"] = simulation.physics.name
+        self.start_time = time.perf_counter()
+        self._events = []
+
+    def record(self, kind, frame, x=0.0, y=0.0, arg=0):
+        self._events.append((
+            EVENT_KINDS.index(kind),
+            frame,
+            time.perf_counter() - self.start_time,
+            x,
+            y,
+            arg,
+        ))
+
+    def get_trace(self):
+        self.trace.events = np.array(self._events, dtype=EVENT_DTYPE)
+        return self.trace
+
+    def save(self, path):
+        self.get_trace().save(path)
+
+
+def create_replay(trace, physics=None): #simulación + controlador en el mismo estado inicial que al grabar
+    #physics permite reproducir la traza con otro backend que el de la grabación
+    physics = physics or trace.params.get("physics", "python")
+    simulation = BubbleSimulation(trace.width, trace.height, seed=trace.seed, physics=physics)
+    for name in TRACE_PARAMS:
+        if name in trace.params:
+            setattr(simulation, name, trace.params[name])
+
+    controller = InteractionController(simulation, verbose=False)
+    controller.add_initial_bubbles()
+    return simulation, controller
+
+
+def replay_trace(trace, on_frame=None, physics=None): #aplica la traza frame a frame sobre una simulación sin ventana
+    if isinstance(trace, str):
+        trace = InputTrace.load(trace)
+    simulation, controller = create_replay(trace, physics)
+    governor = QualityGovernor(simulation) #solo aplica los niveles grabados
+    corner = None  #(x_min, y_min) del último evento "focus"
+
+    for kind, _, _, x, y, arg in trace.events.tolist():
+        kind = EVENT_KINDS[kind]
+        if kind == "frame":
+            controller.update(x, bool(arg))
+            if on_frame is not None:
+                on_frame(simulation, controller.frame_count)
+        elif kind == "motion":
+            controller.mouse_motion(x, y)
+        elif kind == "press":
+            controller.mouse_press(x, y, BUTTON_NAMES[arg])
+        elif kind == "release":
+            controller.mouse_release(x, y, BUTTON_NAMES[arg])
+        elif kind == "drag":
+            controller.mouse_drag(x, y, {name for i, name in enumerate(BUTTON_NAMES) if arg & (1 << i)})
+        elif kind == "key":
+            controller.key_press(KEY_NAMES[arg], x, y)
+        elif kind == "quality":
+            governor.set_level(arg)
+        elif kind == "focus":
+            if arg == 0:
+                corner = (x, y)
+            else:
+                controller.set_focus(None if arg < 0 else (*corner, x, y))
+
+    return simulation
+
+
+def state_digest(simulation): #hash del estado, para comparar replays como caso de regresión
+    digest = hashlib.sha256()
+    for bubble in simulation.bubbles:
+        digest.update(np.asarray(bubble.position, dtype=np.float64).tobytes())
+        digest.update(np.asarray(bubble.speed, dtype=np.float64).tobytes())
+        digest.update(struct.pack("<d", bubble.radius))
+    return digest.hexdigest()
+
+
+def benchmark_trace(trace, repeats=1, physics=None): #mide el tiempo por frame al reproducir la traza
+    if isinstance(trace, str):
+        trace = InputTrace.load(trace)
+
+    runs = []
+    digests = set()
+    for _ in range(repeats):
+        frame_times = []
+        last = [time.perf_counter()]
+
+        def on_frame(simulation, frame):
+            now = time.perf_counter()
+            frame_times.append(now - last[0])
+            last[0] = now
+
+        simulation = replay_trace(trace, on_frame, physics)
+        runs.append(frame_times)
+        digests.add(state_digest(simulation))
+
+    frame_times = np.array([t for run in runs for t in run]) * 1000.0
+    if not len(frame_times):
+        frame_times = np.zeros(1)
+    return {
+        'frames': trace.get_frame_count(),
+        'repeticiones': repeats,
+        'ms promedio': float(frame_times.mean()),
+        'ms p95': float(np.percentile(frame_times, 95)),
+        'ms máximo': float(frame_times.max()),
+        'determinista': len(digests) == 1,
+        'digest': digests.pop(),
+    }
@@ -0,0 +1,173 @@
+#Lógica de interacción (mouse y teclado) separada de pyglet, para que la misma
+#secuencia de eventos se pueda aplicar tanto en la ventana como en un replay sin ventana
+
+import math
+
+KEY_NAMES = ("SPACE", "C", "P", "R", "E", "UP", "DOWN", "LEFT", "RIGHT")
+BUTTON_NAMES = ("LEFT", "RIGHT", "MIDDLE")
+
+MAX_CATCH_UP = 1.0  #segundos simulados como máximo en un update con catch_up
+
+
+class InteractionController: #traduce eventos de entrada en acciones sobre la simulación
+
+    def __init__(self, simulation, recorder=None, verbose=True):
+        self.simulation = simulation
+        self.recorder = recorder
+        self.verbose = verbose
+
+        self.paused = False
+        self.mouse_pressed = False
+        self.mouse_x = 0
+        self.mouse_y = 0
+
+        self.frame_count = 0
+        self.continuous_spawn = False
+        self.spawn_timer = 0
+
+    def _log(self, message): #mensajes para el usuario, van al registro de eventos
+        if self.verbose:
+            self.simulation.events.emit("info", self.simulation.frame_index, message=message)
+
+    def _param(self, name, value): #cambio de un parámetro de la simulación
+        self.simulation.events.emit("param", self.simulation.frame_index, name=name, value=round(value, 2))
+
+    def _record(self, kind, x=0.0, y=0.0, arg=0):
+        if self.recorder is not None:
+            self.recorder.record(kind, self.frame_count, x, y, arg)
+
+    def set_focus(self, bounds): #región visible (x_min, y_min, x_max, y_max) o None, ver BubbleSimulation.focus_bounds
+        #decide qué se simula en frames alternados, así que se graba cuando cambia
+        if bounds is not None:
+            bounds = tuple(float(v) for v in bounds)
+        if bounds == self.simulation.focus_bounds:
+            return
+        if bounds is None:
+            self._record("focus", arg=-1)
+        else:
+            self._record("focus", bounds[0], bounds[1], 0)
+            self._record("focus", bounds[2], bounds[3], 1)
+        self.simulation.focus_bounds = bounds
+
+    def add_initial_bubbles(self): #añade burbujas iniciales a la simulación
+        self.simulation.spawn_pattern("scatter", 12)
+
+    def mouse_motion(self, x, y):
+        self._record("motion", x, y)
+        self.mouse_x = x
+        self.mouse_y = y
+        self.simulation.update_mouse_position(x, y)
+
+    def mouse_press(self, x, y, button):
+        self._record("press", x, y, BUTTON_NAMES.index(button))
+        self.mouse_pressed = True
+        self.mouse_x = x
+        self.mouse_y = y
+
+        self.simulation.update_mouse_position(x, y)
+
+        if button == "LEFT":
+            bubble_exploded = self.simulation.explode_bubble_at_position(x, y)
+            if bubble_exploded:
+                self._log("Burbuja explotada!")
+            else:
+                self.simulation.add_bubble_at_mouse(x, y)
+                self._log("Nueva burbuja añadida")
+
+        elif button == "RIGHT":
+            self.simulation.add_bubble_explosion(x, y, 10)
+            self._log("Explosión de burbujas!")
+
+    def mouse_release(self, x, y, button):
+        self._record("release", x, y, BUTTON_NAMES.index(button))
+        self.mouse_pressed = False
+        self.continuous_spawn = False
+
+    def mouse_drag(self, x, y, buttons): #buttons: conjunto de nombres de BUTTON_NAMES
+        mask = sum(1 << i for i, name in enumerate(BUTTON_NAMES) if name in buttons)
+        self._record("drag", x, y, mask)
+        self.mouse_x = x
+        self.mouse_y = y
+
+        self.simulation.update_mouse_position(x, y)
+
+        if "LEFT" in buttons:
+            self.continuous_spawn = True
+
+            if self.frame_count % 3 == 0:
+                if not self.simulation.explode_bubble_at_position(x, y):
+                    self.simulation.add_bubble_at_mouse(x, y)
+
+    def key_press(self, name, x=None, y=None): #name: uno de KEY_NAMES
+        #x, y: centro de la vista en coordenadas de mundo (donde explota E); sin cámara,
+        #el centro del mundo. Se graba con la tecla para que el replay explote en el mismo lugar
+        simulation = self.simulation
+        if x is None:
+            x, y = simulation.width // 2, simulation.height // 2
+        self._record("key", x, y, KEY_NAMES.index(name))
+
+        if name == "SPACE":
+            simulation.spawn_pattern("scatter", 8)
+
+        elif name == "C":
+            simulation.clear_bubbles()
+            self._log("Burbujas eliminadas")
+
+        elif name == "P":
+            self.paused = not self.paused
+            self._log(f"Simulación {'pausada' if self.paused else 'reanudada'}")
+
+        elif name == "R":
+            simulation.clear_bubbles()
+            self.add_initial_bubbles()
+            self._log("Reseteo de la simulación")
+
+        elif name == "E":
+            simulation.add_bubble_explosion(x, y, 15)
+            self._log("Explosión en el centro de la vista!")
+
+        elif name == "UP":
+            simulation.mouse_repulsion_strength *= 1.2
+            self._param("mouse_repulsion_strength", simulation.mouse_repulsion_strength)
+
+        elif name == "DOWN":
+            simulation.mouse_repulsion_strength *= 0.8
+            self._param("mouse_repulsion_strength", simulation.mouse_repulsion_strength)
+
+        elif name == "LEFT":
+            simulation.mouse_repulsion_radius = max(50, simulation.mouse_repulsion_radius * 0.8)
+            self._param("mouse_repulsion_radius", simulation.mouse_repulsion_radius)
+
+        elif name == "RIGHT":
+            simulation.mouse_repulsion_radius = min(400, simulation.mouse_repulsion_radius * 1.2)
+            self._param("mouse_repulsion_radius", simulation.mouse_repulsion_radius)
+
+    def update(self, dt, catch_up=False): #un frame de la simulación, retorna el dt efectivo
+        #normalmente dt se limita a 1/30 (un tirón se ve en cámara lenta, no como un salto).
+        #catch_up simula todo dt (hasta MAX_CATCH_UP) en pasos de a lo más 1/30: en reposo
+        #update corre a pocos Hz y con el tope el tiempo simulado iría más lento que el real
+        self._record("frame", dt, arg=int(catch_up))
+        if catch_up:
+            dt = min(dt, MAX_CATCH_UP)
+            steps = max(1, math.ceil(dt * 30.0 - 1e-9))
+            for _ in range(steps):
+                self._step(dt / steps)
+        else:
+            dt = min(dt, 1/30.0)
+            self._step(dt)
+
+        self.frame_count += 1
+        return dt
+
+    def _step(self, dt):
+        self.simulation.update_mouse_position(self.mouse_x, self.mouse_y)
+
+        if not self.paused:
+            self.simulation.update(dt)
+
+            if self.continuous_spawn:
+                self.spawn_timer += dt
+                if self.spawn_timer > 0.05:
+                    if self.simulation.get_bubble_count() < self.simulation.max_bubbles:
+                        self.simulation.add_bubble_at_mouse(self.mouse_x, self.mouse_y)
+                    self.spawn_timer = 0
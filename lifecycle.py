@@ -0,0 +1,107 @@
+import heapq
+import itertools
+
+
+#Ciclo de vida de las burbujas sin revisar cada burbuja en cada frame.
+#
+#El reloj es el tiempo simulado. Al registrar una burbuja se agenda en un heap su
+#expiración (nacimiento + lifetime) y el momento en que puede dividirse; advance()
+#solo saca los eventos vencidos. Los eventos de burbujas que ya no existen se
+#descartan al salir del heap (borrado perezoso).
+#
+#Todas las burbujas envejecen al mismo ritmo, así que el orden de edad es el orden
+#de nacimiento: un dict en orden de inserción permite sacar las k más viejas sin ordenar.
+
+SPLIT_GRACE = 1.0  #edad mínima para dividirse
+SPLIT_COOLDOWN = 2.0  #tiempo entre divisiones (al nacer cuenta como si se hubiera dividido)
+
+EXPIRE = 0
+SPLIT_READY = 1
+
+
+class LifecycleScheduler: #expiraciones, permisos de división y desalojo de las más viejas
+
+    def __init__(self):
+        self.time = 0.0
+        self.by_age = {}  #id -> burbuja, de la más vieja a la más nueva
+        self._heap = []  #(hora, seq, tipo, id)
+        self._seq = itertools.count()
+        self._split_ready_at = {}  #id -> hora del SPLIT_READY vigente
+
+    def __len__(self):
+        return len(self.by_age)
+
+    def _schedule(self, when, kind, bubble_id):
+        heapq.heappush(self._heap, (when, next(self._seq), kind, bubble_id))
+
+    def _schedule_split(self, bubble, when):
+        bubble.can_split = False
+        self._split_ready_at[bubble.id] = when
+        self._schedule(when, SPLIT_READY, bubble.id)
+
+    def add(self, bubble): #registra una burbuja nueva (normalmente de edad 0)
+        birth = self.time - bubble.age
+        self.by_age[bubble.id] = bubble
+        self._schedule(birth + bubble.lifetime, EXPIRE, bubble.id)
+        self._schedule_split(bubble, birth + max(SPLIT_GRACE, SPLIT_COOLDOWN))
+
+    def remove(self, bubble): #la burbuja dejó la simulación (sus eventos se descartan solos)
+        self.by_age.pop(bubble.id, None)
+        self._split_ready_at.pop(bubble.id, None)
+
+    def on_split(self, bubble): #la burbuja se acaba de dividir: reinicia su espera
+        self._schedule_split(bubble, self.time + SPLIT_COOLDOWN)
+
+    def advance(self, dt): #avanza el reloj y retorna las burbujas que expiraron
+        self.time += dt
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= self.time:
+            when, _, kind, bubble_id = heapq.heappop(heap)
+            bubble = self.by_age.get(bubble_id)
+            if bubble is None:
+                continue
+            if kind == EXPIRE:
+                expired.append(bubble)
+                self.remove(bubble)
+            elif self._split_ready_at.get(bubble_id) == when:
+                bubble.can_split = True
+                del self._split_ready_at[bubble_id]
+
+        #demasiadas entradas de burbujas que ya no están: reconstruir el heap
+        if len(heap) > 4 * len(self.by_age) + 64:
+            self._heap = [entry for entry in heap if entry[3] in self.by_age]
+            heapq.heapify(self._heap)
+        return expired
+
+    def evict(self, count): #saca y retorna las count burbujas más viejas
+        evicted = []
+        for bubble_id in itertools.islice(self.by_age, count):
+            evicted.append(self.by_age[bubble_id])
+        for bubble in evicted:
+            self.remove(bubble)
+        return evicted
+
+    def is_synced(self, bubbles): #el scheduler tiene exactamente estas burbujas
+        by_age = self.by_age
+        return len(by_age) == len(bubbles) and all(b.id in by_age for b in bubbles)
+
+    def sync(self, bubbles): #concilia con una lista que se modificó por fuera del scheduler
+        #las que siguen conservan sus eventos (y su espera tras dividirse); las que faltan
+        #se quitan y las nuevas se agregan según su edad
+        current = {b.id for b in bubbles}
+        for bubble in [b for b in self.by_age.values() if b.id not in current]:
+            self.remove(bubble)
+        added = [b for b in bubbles if b.id not in self.by_age]
+        for bubble in added:
+            self.add(bubble)
+        if added: #mantener el orden de más vieja a más nueva
+            self.by_age = dict(sorted(self.by_age.items(), key=lambda item: -item[1].age))
+
+    def clear(self):
+        self.by_age.clear()
+        self._heap.clear()
+        self._split_ready_at.clear()
+
+    def get_pending_count(self): #eventos en el heap (incluye los de burbujas ya eliminadas)
+        return len(self._heap)
@@ -0,0 +1,341 @@
+import itertools
+import random
+
+import numpy as np
+
+from .bubble_agent import FLOTAGE_FORCE
+
+
+#Backends de la física por frame de BubbleSimulation.update: fuerzas (repulsión del
+#mouse, viento, turbulencia, flotabilidad, arrastre), integración, colisiones, marcas
+#de división (to_split) y muertes físicas (radio o rapidez). La simulación decide qué
+#burbujas se simulan en el frame (dormidas y fuera de foco quedan fuera), aplica las
+#divisiones y la expiración por edad (ver lifecycle.py).
+#
+#   step(simulation, active, dts, wind, collide) -> lista de bools (sigue viva)
+#       active: índices en simulation.bubbles, dts: dt de cada una, wind: (len(active), 2)
+#
+#"python" es la referencia (Bubble.update_pos/handle_collision, burbuja por burbuja).
+#"numpy" resuelve todo con arrays; las colisiones usan las velocidades del inicio del
+#paso (Jacobi) en vez de ir actualizando en orden, así que no es idéntico a la
+#referencia: compare_backends mide cuánto se separan.
+
+RESTITUTION = 0.8
+DRAG_COEFFICIENT = 0.05
+
+
+class PhysicsBackend: #interfaz de los backends de física
+    name = None
+
+    def step(self, simulation, active, dts, wind, collide=True):
+        raise NotImplementedError
+
+
+class PythonPhysics(PhysicsBackend): #referencia: el loop original, una burbuja a la vez
+    name = "python"
+
+    def step(self, simulation, active, dts, wind, collide=True):
+        profiler = simulation.profiler
+        bubbles = simulation.bubbles
+        alive = []
+        for i, step_dt, wind_acceleration in zip(active, dts, wind):
+            bubble = bubbles[i]
+            if profiler:
+                profiler.switch("fuerzas")
+            simulation.apply_mouse_repulsion(bubble)
+
+            bubble.speed += wind_acceleration * step_dt
+
+            turbulence = np.array([   #turbulencia random
+                random.uniform(-50, 50),
+                random.uniform(-25, 25)
+            ])
+            bubble.speed += turbulence * (step_dt * simulation.turbulence_scale)
+
+            if profiler:
+                profiler.switch("integración")
+            alive.append(bubble.update_pos(
+                bubbles, step_dt, simulation.turbulence_scale, simulation.split_chance, collide
+            ))
+        return alive
+
+
+class NumpyPhysics(PhysicsBackend): #todas las burbujas activas de una vez
+    name = "numpy"
+
+    def step(self, simulation, active, dts, wind, collide=True):
+        profiler = simulation.profiler
+        bubbles = simulation.bubbles
+        active = np.asarray(active, dtype=np.intp)
+        n = len(active)
+        if not n:
+            return []
+        if profiler:
+            profiler.switch("fuerzas")
+
+        dts = np.asarray(dts, dtype=float)
+        scale = simulation.turbulence_scale
+        active_bubbles = [bubbles[i] for i in active]
+        position = np.array([b.position for b in active_bubbles], dtype=float)
+        speed = np.array([b.speed for b in active_bubbles], dtype=float)
+        weight = np.array([b.weight for b in active_bubbles])
+        max_speed = np.array([b.max_speed for b in active_bubbles], dtype=float)
+
+        self._mouse_repulsion(simulation, position, speed, max_speed)
+        speed += wind * dts[:, None]
+
+        #mismo generador y orden que la referencia: (-50, 50) y (-25, 25) por burbuja
+        u = np.array([random.random() for _ in range(2 * n)]).reshape(n, 2)
+        speed += (u * [100.0, 50.0] - [50.0, 25.0]) * (dts * scale)[:, None]
+
+        if profiler:
+            profiler.switch("integración")
+        age = np.array([b.age for b in active_bubbles], dtype=float) + dts
+        speed += FLOTAGE_FORCE * (dts / weight)[:, None]
+        speed += np.random.uniform([-20.0, -10.0], [20.0, 10.0], (n, 2)) * (dts * scale)[:, None]
+        speed += -DRAG_COEFFICIENT * speed * np.sqrt((speed * speed).sum(axis=1))[:, None] * dts[:, None]
+        new_position = position + dts[:, None] * speed
+
+        for k, bubble in enumerate(active_bubbles):
+            bubble.age = age[k]
+            bubble.speed = speed[k]
+
+        if collide and len(bubbles) > 1:
+            self._collide(simulation, active, new_position)
+
+        lifetime = np.array([b.lifetime for b in active_bubbles])
+        base_radius = np.array([b.base_radius for b in active_bubbles])
+        strength = base_radius * base_radius * np.maximum(0.3, 1.0 - age / lifetime) * 2
+        speed = np.array([b.speed for b in active_bubbles], dtype=float)
+        alive = (
+            np.array([b.radius > b.min_radius for b in active_bubbles])
+            & (np.sqrt((speed * speed).sum(axis=1)) < np.array([b.max_speed * 2 for b in active_bubbles]))
+        )
+
+        for k, bubble in enumerate(active_bubbles):
+            bubble.position = new_position[k]
+            bubble.metaball_strength = strength[k]
+        return alive.tolist()
+
+    @staticmethod
+    def _mouse_repulsion(simulation, position, speed, max_speed): #vectorizado de apply_mouse_repulsion
+        to_bubble = position - simulation.mouse_pos
+        distance = np.sqrt((to_bubble * to_bubble).sum(axis=1))
+        radius = simulation.mouse_repulsion_radius
+        mask = (distance < radius) & (distance > 1.0)
+        if not mask.any():
+            return
+
+        d = distance[mask]
+        force_magnitude = simulation.mouse_repulsion_strength * (1.0 - np.maximum(0.1, d / radius)) / (d + 10.0)
+        direction = to_bubble[mask] / d[:, None]
+        speed[mask] += direction * force_magnitude[:, None] * 0.016
+        perpendicular = np.stack([-direction[:, 1], direction[:, 0]], axis=1)
+        speed[mask] += perpendicular * (force_magnitude * 0.008)[:, None]
+
+        #limitar velocidad máxima de las burbujas afectadas
+        rows = np.flatnonzero(mask)
+        magnitude = np.sqrt((speed[rows] * speed[rows]).sum(axis=1))
+        fast = magnitude > max_speed[rows]
+        rows = rows[fast]
+        speed[rows] *= (max_speed[rows] / magnitude[fast])[:, None]
+
+    @staticmethod
+    def _collide(simulation, active, new_position): #choques elásticos entre pares, como handle_collision
+        bubbles = simulation.bubbles
+        count = len(bubbles)
+        position = np.array([b.position for b in bubbles], dtype=float)
+        speed = np.array([b.speed for b in bubbles], dtype=float)
+        radius = np.array([b.radius for b in bubbles])
+        weight = np.array([b.weight for b in bubbles])
+        max_speed = np.array([b.max_speed for b in bubbles])
+        split_mode = np.array([b.mode == "split" for b in bubbles])
+
+        #las activas se prueban en su nueva posición, el resto donde está
+        probe = position.copy()
+        probe[active] = new_position
+        checks = np.zeros(count, dtype=bool)
+        checks[active] = [bubbles[i].mode != "overlap" for i in active]
+
+        #solo los pares candidatos del sweep and prune, sin matrices N×N
+        a, b = sweep_and_prune(probe, radius)
+        diff = probe[a] - probe[b]
+        d = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        keep = (d <= radius[a] + radius[b]) & (checks[a] | checks[b]) & (d > 0)
+        a, b, d = a[keep], b[keep], d[keep]
+        if not len(a):
+            return
+
+        normal = (position[a] - position[b]) / d[:, None]
+        approach = ((speed[a] - speed[b]) * normal).sum(axis=1)
+        closing = approach < 0 #solo si las burbujas se acercan
+        a, b, normal, approach = a[closing], b[closing], normal[closing], approach[closing]
+        if not len(a):
+            return
+
+        m1 = weight[a]
+        m2 = weight[b]
+        impulse = ((1 + RESTITUTION) * approach)[:, None] * normal
+        delta_a = -(m2 / (m1 + m2))[:, None] * impulse
+        delta_b = (m1 / (m1 + m2))[:, None] * impulse
+
+        #energía transferida en cada choque, como si fuera el único
+        new_a = np.clip(speed[a] + delta_a, -max_speed[a, None], max_speed[a, None])
+        new_b = np.clip(speed[b] + delta_b, -max_speed[b, None], max_speed[b, None])
+        e_a_b = 0.5 * m1 * ((speed[a] ** 2).sum(axis=1) - (new_a ** 2).sum(axis=1))
+        e_b_a = 0.5 * m2 * ((speed[b] ** 2).sum(axis=1) - (new_b ** 2).sum(axis=1))
+        transfers = split_mode[a] | split_mode[b]
+
+        delta_speed = np.zeros_like(speed)
+        np.add.at(delta_speed, a, delta_a)
+        np.add.at(delta_speed, b, delta_b)
+        energy_loss = np.zeros(count)
+        np.add.at(energy_loss, a[transfers], 0.5 * e_b_a[transfers])
+        np.add.at(energy_loss, b[transfers], 0.5 * e_a_b[transfers])
+
+        hit = np.unique(np.concatenate([a, b]))
+        speed[hit] = np.clip(speed[hit] + delta_speed[hit], -max_speed[hit, None], max_speed[hit, None])
+
+        split_chance = simulation.split_chance
+        candidates = []
+        for i in hit:
+            bubble = bubbles[i]
+            bubble.speed = speed[i]
+            bubble.remaining_energy -= energy_loss[i]
+            if (
+                split_mode[i]
+                and energy_loss[i] != 0
+                and bubble.radius > bubble.min_radius * 3
+                and bubble.remaining_energy < bubble.resistance * 0.5
+                and bubble.can_split
+            ):
+                candidates.append(bubble)
+        if candidates:
+            for bubble, roll in zip(candidates, np.random.random(len(candidates))):
+                if roll < split_chance:
+                    bubble.to_split = True
+
+
+def sweep_and_prune(positions, radii): #pares (i, j) cuya separación en x permite contacto
+    count = len(positions)
+    if count < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    order = np.argsort(positions[:, 0])
+    xs = positions[order, 0]
+    limit = np.searchsorted(xs, xs + radii[order] + radii.max(), side='right')
+    counts = limit - np.arange(count) - 1
+    starts = np.cumsum(counts) - counts
+    first = np.repeat(np.arange(count), counts)
+    second = first + 1 + np.arange(counts.sum()) - np.repeat(starts, counts)
+    return order[first], order[second]
+
+
+PHYSICS_BACKENDS = {
+    "python": PythonPhysics,
+    "numpy": NumpyPhysics,
+}
+
+
+def create_physics(physics): #nombre de PHYSICS_BACKENDS o una instancia de PhysicsBackend
+    if isinstance(physics, PhysicsBackend):
+        return physics
+    if physics not in PHYSICS_BACKENDS:
+        raise ValueError(f"Backend de física desconocido: {physics}")
+    return PHYSICS_BACKENDS[physics]()
+
+
+def _divergence(reference, candidate, frame): #diferencias entre dos simulaciones, por id de burbuja
+    ref = {b.id: b for b in reference.bubbles}
+    cand = {b.id: b for b in candidate.bubbles}
+    common = sorted(ref.keys() & cand.keys())
+
+    result = {
+        'frame': frame,
+        'burbujas referencia': len(ref),
+        'burbujas candidato': len(cand),
+        'sin pareja': len(ref) + len(cand) - 2 * len(common),
+        'posición máx': 0.0,
+        'posición media': 0.0,
+        'velocidad máx': 0.0,
+        'velocidad media': 0.0,
+    }
+    if common:
+        position = np.array([ref[i].position for i in common]) - np.array([cand[i].position for i in common])
+        speed = np.array([ref[i].speed for i in common]) - np.array([cand[i].speed for i in common])
+        position = np.sqrt((position * position).sum(axis=1))
+        speed = np.sqrt((speed * speed).sum(axis=1))
+        result['posición máx'] = float(position.max())
+        result['posición media'] = float(position.mean())
+        result['velocidad máx'] = float(speed.max())
+        result['velocidad media'] = float(speed.mean())
+    return result
+
+
+def compare_backends(reference="python", candidate="numpy", scenario="calma", frames=300, seed=0, tolerance=1e-6, collide=True):
+    #corre dos backends en paralelo desde el mismo estado y reporta la divergencia por frame.
+    #cada simulación tiene sus propios generadores y contador de ids (se intercambian en
+    #cada paso), así que ambas consumen los números aleatorios como si corrieran solas.
+    #collide=False apaga las colisiones, la única parte en que los backends difieren a propósito
+    from .alloc_profile import setup_scenario
+    from .bubble_agent import Bubble
+
+    saved = (random.getstate(), np.random.get_state(), Bubble._id_counter)
+    dt = 1.0 / 60
+    runs = []
+    report = []
+    try:
+        first_id = next(Bubble._id_counter)
+        for physics in (reference, candidate):
+            Bubble._id_counter = itertools.count(first_id)
+            simulation = setup_scenario(scenario, seed, physics=physics)
+            if not collide:
+                simulation.collision_interval = frames + 1 #ningún frame de la corrida choca
+            runs.append([simulation, random.getstate(), np.random.get_state(), Bubble._id_counter])
+
+        for frame in range(frames):
+            for run in runs:
+                simulation = run[0]
+                random.setstate(run[1])
+                np.random.set_state(run[2])
+                Bubble._id_counter = run[3]
+                if scenario == "explosiones" and frame % 10 == 0:
+                    simulation.add_bubble_explosion(600, 400, 10)
+                simulation.update(dt)
+                run[1] = random.getstate()
+                run[2] = np.random.get_state()
+            report.append(_divergence(runs[0][0], runs[1][0], frame))
+    finally:
+        random.setstate(saved[0])
+        np.random.set_state(saved[1])
+        Bubble._id_counter = saved[2]
+
+    diverged = [
+        r['frame'] for r in report
+        if r['posición máx'] > tolerance or r['sin pareja'] or r['burbujas referencia'] != r['burbujas candidato']
+    ]
+    return {
+        'referencia': reference,
+        'candidato': candidate,
+        'escenario': scenario,
+        'frames': report,
+        'primer frame divergente': diverged[0] if diverged else None,
+        'posición máx': max((r['posición máx'] for r in report), default=0.0),
+        'velocidad máx': max((r['velocidad máx'] for r in report), default=0.0),
+        'sin pareja máx': max((r['sin pareja'] for r in report), default=0),
+    }
+
+
+def print_comparison(result, every=30): #muestra un reporte de compare_backends
+    print(f"\n{'='*72}")
+    print(f"   {result['referencia']} vs {result['candidato']} ({result['escenario']})")
+    print(f"{'='*72}")
+    print(f"{'frame':>6}{'ref':>6}{'cand':>6}{'sin par':>9}{'pos máx':>12}{'pos media':>12}{'vel máx':>12}")
+    for r in result['frames']:
+        if r['frame'] % every == 0 or r['frame'] == result['primer frame divergente']:
+            print(
+                f"{r['frame']:>6}{r['burbujas referencia']:>6}{r['burbujas candidato']:>6}{r['sin pareja']:>9}"
+                f"{r['posición máx']:>12.3g}{r['posición media']:>12.3g}{r['velocidad máx']:>12.3g}"
+            )
+    print(f"Primer frame divergente: {result['primer frame divergente']}")
+    print(f"Máximos: posición {result['posición máx']:.3g}, velocidad {result['velocidad máx']:.3g}, sin pareja {result['sin pareja máx']}")
+    print(f"{'='*72}\n")
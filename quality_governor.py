@@ -0,0 +1,131 @@
+import time
+
+
+#Niveles de calidad, de mejor (0) a peor. Cada nivel baja una perilla más, en orden
+#de prioridad: primero lo que menos se nota (spawn random), al final la resolución.
+#Los factores se aplican sobre los valores originales de la simulación.
+QUALITY_LEVELS = (
+    {},
+    {"spawn": 0.5},
+    {"spawn": 0.0},
+    {"spawn": 0.0, "max_bubbles": 0.75},
+    {"spawn": 0.0, "max_bubbles": 0.5},
+    {"spawn": 0.0, "max_bubbles": 0.5, "turbulence": 0.5, "split": 0.5},
+    {"spawn": 0.0, "max_bubbles": 0.5, "turbulence": 0.25, "split": 0.0},
+    {"spawn": 0.0, "max_bubbles": 0.5, "turbulence": 0.25, "split": 0.0, "collision_interval": 2},
+    {"spawn": 0.0, "max_bubbles": 0.5, "turbulence": 0.25, "split": 0.0, "collision_interval": 3},
+    {"spawn": 0.0, "max_bubbles": 0.5, "turbulence": 0.25, "split": 0.0, "collision_interval": 3, "render_scale": 0.75},
+    {"spawn": 0.0, "max_bubbles": 0.5, "turbulence": 0.25, "split": 0.0, "collision_interval": 3, "render_scale": 0.5},
+)
+
+
+class QualityGovernor: #ajusta la calidad para mantener el tiempo de frame bajo un objetivo
+    #se le entregan los tiempos medidos de update y render de cada frame. Con histéresis:
+    #baja la calidad si el promedio supera degrade_ratio * objetivo durante degrade_delay
+    #segundos, y la sube solo si queda bajo recover_ratio * objetivo durante recover_delay
+    #(más largo), así no oscila entre dos niveles.
+
+    def __init__(
+        self,
+        simulation,
+        renderer=None,
+        target_fps=60,
+        degrade_ratio=1.0,
+        recover_ratio=0.6,
+        degrade_delay=0.5,
+        recover_delay=3.0,
+        smoothing=0.1,
+    ):
+        self.simulation = simulation
+        self.renderer = renderer
+        self.target_frame_time = 1.0 / target_fps
+        self.degrade_ratio = degrade_ratio
+        self.recover_ratio = recover_ratio
+        self.degrade_delay = degrade_delay
+        self.recover_delay = recover_delay
+        self.smoothing = smoothing  #peso de cada medición en el promedio exponencial
+
+        #valores originales, los niveles se aplican como factores sobre ellos
+        self.base = {
+            "spawn": simulation.spawn_rate,
+            "max_bubbles": simulation.max_bubbles,
+            "turbulence": simulation.turbulence_scale,
+            "split": simulation.split_chance,
+        }
+        #resolución de render: solo si el renderer la soporta (un renderer por CPU);
+        #MetaballRenderer dibuja en la GPU y no tiene esta perilla
+        self.render_scalable = hasattr(renderer, "render_scale")
+
+        self.level = 0
+        self.frame_time = 0.0  #promedio exponencial de update + render
+        self.update_time = 0.0
+        self.render_time = 0.0
+        self.over_time = 0.0  #segundos seguidos sobre el umbral de degradación
+        self.under_time = 0.0  #segundos seguidos bajo el umbral de recuperación
+        self.decisions = []  #(hora, nivel anterior, nivel nuevo, tiempo de frame promedio)
+        self.history = 20
+        #se llama con el nivel nuevo en cada cambio (p.ej. para grabarlo en la traza de
+        #entrada: los niveles dependen de tiempos reales y un replay no los puede deducir)
+        self.on_change = None
+
+    def record(self, update_time, render_time, dt): #registra un frame y decide si cambiar de nivel
+        a = self.smoothing
+        self.update_time += (update_time - self.update_time) * a
+        self.render_time += (render_time - self.render_time) * a
+        self.frame_time = self.update_time + self.render_time
+
+        if self.frame_time > self.target_frame_time * self.degrade_ratio:
+            self.over_time += dt
+            self.under_time = 0.0
+        elif self.frame_time < self.target_frame_time * self.recover_ratio:
+            self.under_time += dt
+            self.over_time = 0.0
+        else: #banda muerta entre los dos umbrales
+            self.over_time = 0.0
+            self.under_time = 0.0
+
+        if self.over_time >= self.degrade_delay and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1)
+        elif self.under_time >= self.recover_delay and self.level > 0:
+            self.set_level(self.level - 1)
+
+    def set_level(self, level): #aplica un nivel de QUALITY_LEVELS a la simulación
+        level = max(0, min(level, len(QUALITY_LEVELS) - 1))
+        if level == self.level:
+            return
+        self.decisions.append((time.time(), self.level, level, self.frame_time))
+        if len(self.decisions) > self.history:
+            self.decisions.pop(0)
+        self.simulation.events.emit("param", self.simulation.frame_index, name="quality_level", value=level)
+        self.level = level
+        self.over_time = 0.0
+        self.under_time = 0.0
+
+        knobs = QUALITY_LEVELS[level]
+        simulation = self.simulation
+        simulation.spawn_rate = self.base["spawn"] * knobs.get("spawn", 1.0)
+        simulation.max_bubbles = max(1, int(self.base["max_bubbles"] * knobs.get("max_bubbles", 1.0)))
+        simulation.turbulence_scale = self.base["turbulence"] * knobs.get("turbulence", 1.0)
+        simulation.split_chance = self.base["split"] * knobs.get("split", 1.0)
+        simulation.collision_interval = knobs.get("collision_interval", 1)
+        if self.render_scalable:
+            self.renderer.render_scale = knobs.get("render_scale", 1.0)
+        if self.on_change is not None:
+            self.on_change(level)
+
+    def reset(self): #vuelve a calidad máxima
+        self.set_level(0)
+
+    def get_stats(self):
+        knobs = QUALITY_LEVELS[self.level]
+        return {
+            'nivel': self.level,
+            'niveles': len(QUALITY_LEVELS) - 1,
+            'frame ms': self.frame_time * 1000.0,
+            'update ms': self.update_time * 1000.0,
+            'render ms': self.render_time * 1000.0,
+            'objetivo ms': self.target_frame_time * 1000.0,
+            'perillas': {name: value for name, value in knobs.items()
+                         if name != "render_scale" or self.render_scalable},
+            'decisiones': list(self.decisions),
+        }
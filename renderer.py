@@ -4,6 +4,10 @@ import numpy as np
 import os
 from pathlib import Path
 
+
+MAX_BUBBLES = 125  #debe coincidir con el tamaño de los arrays en fragment.glsl
+INFLUENCE_CUTOFF = 0.05  #aporte mínimo (el umbral del shader es 1.2) para considerar visible una burbuja
+
 class MetaballRenderer: #Podría incluirlo en main pero lo hago aparte para que se vea más ordenado
     def __init__(self, width, height):
         self.width = width
@@ -11,6 +15,9 @@ class MetaballRenderer: #Podría incluirlo en main pero lo hago aparte para que
         self.shader_pipeline = None
         self.vertex_list = None
         self.is_initialized = False
+        self.visible_count = 0
+        self.culled_count = 0
+        self.profiler = None #ver alloc_profile.AllocationProfiler
         
         self._init_opengl_resources()
     
@@ -67,7 +74,51 @@ class MetaballRenderer: #Podría incluirlo en main pero lo hago aparte para que
         
         self.is_initialized = True
     
-    def render(self, bubbles, current_time):
+    def get_visible(self, bubbles, camera=None): #pasada vectorizada de visibilidad
+        #retorna posiciones (en pantalla), fuerzas y colores de las burbujas cuya zona de
+        #influencia toca el viewport, como mucho MAX_BUBBLES (las más fuertes)
+        if not bubbles:
+            return np.zeros((0, 2), np.float32), np.zeros(0, np.float32), np.zeros((0, 3), np.float32)
+
+        positions = np.array([b.position for b in bubbles], dtype=np.float32)
+        strengths = np.array([b.metaball_strength for b in bubbles], dtype=np.float32)
+
+        if camera is None:
+            x_min, y_min, x_max, y_max = 0.0, 0.0, self.width, self.height
+            zoom = 1.0
+        else:
+            x_min, y_min, x_max, y_max = camera.get_bounds()
+            zoom = camera.zoom
+
+        #radio donde el aporte de la metaball cae bajo INFLUENCE_CUTOFF: s / d^2 = cutoff
+        influence = np.sqrt(strengths / INFLUENCE_CUTOFF)
+        visible = (
+            (positions[:, 0] + influence >= x_min)
+            & (positions[:, 0] - influence <= x_max)
+            & (positions[:, 1] + influence >= y_min)
+            & (positions[:, 1] - influence <= y_max)
+        )
+        indices = np.flatnonzero(visible)
+        if len(indices) > MAX_BUBBLES:
+            #quedarse con las que más aportan
+            indices = indices[np.argpartition(-strengths[indices], MAX_BUBBLES - 1)[:MAX_BUBBLES]]
+
+        positions = positions[indices]
+        strengths = strengths[indices]
+        colors = np.array([bubbles[i].color for i in indices], dtype=np.float32).reshape(-1, 3)
+
+        if camera is not None:
+            #pasar a pixeles de pantalla; la distancia escala con el zoom, la fuerza con su cuadrado
+            positions = camera.world_to_screen(positions).astype(np.float32)
+            strengths = strengths * np.float32(zoom * zoom)
+
+        return positions, strengths, colors
+
+    def render(self, bubbles, current_time, camera=None):
+        profiler = self.profiler
+        if profiler:
+            profiler.switch("visibilidad")
+
         gl.glClearColor(0.05, 0.05, 0.15, 1.0)  #fondo azul oscuro
         gl.glClear(gl.GL_COLOR_BUFFER_BIT)
         
@@ -83,23 +134,23 @@ class MetaballRenderer: #Podría incluirlo en main pero lo hago aparte para que
         if resolution_loc >= 0:
             gl.glUniform2f(resolution_loc, self.width, self.height)
         
-        max_bubbles = 125
+        max_bubbles = MAX_BUBBLES
         
-        if bubbles:
-            positions = np.array([[b.position[0], b.position[1]] for b in bubbles], dtype=np.float32)
-            strengths = np.array([b.metaball_strength for b in bubbles], dtype=np.float32)
-            colors = np.array([b.color for b in bubbles], dtype=np.float32)
-            
+        #solo se suben las burbujas visibles
+        positions, strengths, colors = self.get_visible(bubbles, camera)
+        num_actual_bubbles = len(positions)
+        self.visible_count = num_actual_bubbles
+        self.culled_count = len(bubbles) - num_actual_bubbles
+        
+        if profiler:
+            profiler.switch("upload")
+        
+        if num_actual_bubbles:
             #hacemos que el tamaño de "bubbles" coincida con el máximo de burbujas
-            num_actual_bubbles = len(bubbles)
             if num_actual_bubbles < max_bubbles:
                 positions = np.pad(positions, ((0, max_bubbles - num_actual_bubbles), (0, 0)), 'constant')
                 strengths = np.pad(strengths, (0, max_bubbles - num_actual_bubbles), 'constant')
                 colors = np.pad(colors, ((0, max_bubbles - num_actual_bubbles), (0, 0)), 'constant')
-            elif num_actual_bubbles > max_bubbles:
-                positions = positions[:max_bubbles]
-                strengths = strengths[:max_bubbles]
-                colors = colors[:max_bubbles]
             
             #enviamos los arrays con las props de las burbujas
             pos_loc = gl.glGetUniformLocation(self.shader_pipeline, "bubblePositions")
@@ -114,7 +165,7 @@ class MetaballRenderer: #Podría incluirlo en main pero lo hago aparte para que
             if col_loc >= 0:
                 gl.glUniform3fv(col_loc, max_bubbles, colors.flatten())
             if num_loc >= 0:
-                gl.glUniform1i(num_loc, min(num_actual_bubbles, max_bubbles))
+                gl.glUniform1i(num_loc, num_actual_bubbles)
         else:
             #si no hay burbujas enviamos arrays vacíos (para evitar errores)
             empty_positions = np.zeros((max_bubbles, 2), dtype=np.float32)
@@ -139,4 +190,6 @@ class MetaballRenderer: #Podría incluirlo en main pero lo hago aparte para que
         gl.glBindVertexArray(self.vao)
         gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
         gl.glBindVertexArray(0)
+        if profiler:
+            profiler.switch(None)
 
@@ -0,0 +1,167 @@
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+#Estado de la simulación publicado en un segmento de multiprocessing.shared_memory,
+#para que otros procesos del mismo host lo lean sin copias ni serialización.
+#
+#Layout (little-endian, tamaño fijo según `capacity`):
+#
+#   offset 0, header de 64 bytes (HEADER_DTYPE):
+#       magic     4s   b"BSHM"
+#       version   u4   LAYOUT_VERSION
+#       capacity  u4   máximo de burbujas en los arrays
+#       count     u4   burbujas válidas (las primeras `count` filas)
+#       seq       u8   seqlock: impar mientras se escribe, par cuando es consistente
+#       frame     u8   número de publicación
+#   luego cada array, alineado a 64 bytes, en este orden (ARRAY_FIELDS):
+#       ids        u4  (capacity,)
+#       positions  f4  (capacity, 2)
+#       speeds     f4  (capacity, 2)
+#       radii      f4  (capacity,)
+#       strengths  f4  (capacity,)
+#       colors     f4  (capacity, 3)
+#
+#El escritor incrementa seq antes y después de escribir. Un lector consistente lee
+#seq, lee los datos y vuelve a leer seq: si cambió o era impar, reintenta.
+
+MAGIC = b"BSHM"
+LAYOUT_VERSION = 1
+HEADER_SIZE = 64
+ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u4"),
+    ("capacity", "<u4"),
+    ("count", "<u4"),
+    ("seq", "<u8"),
+    ("frame", "<u8"),
+])
+
+ARRAY_FIELDS = (
+    ("ids", np.dtype("<u4"), ()),
+    ("positions", np.dtype("<f4"), (2,)),
+    ("speeds", np.dtype("<f4"), (2,)),
+    ("radii", np.dtype("<f4"), ()),
+    ("strengths", np.dtype("<f4"), ()),
+    ("colors", np.dtype("<f4"), (3,)),
+)
+
+
+def get_layout(capacity): #offsets de cada array y tamaño total del segmento
+    offsets = {}
+    offset = HEADER_SIZE
+    for name, dtype, shape in ARRAY_FIELDS:
+        offsets[name] = offset
+        size = capacity * dtype.itemsize * int(np.prod(shape, dtype=int))
+        offset += -(-size // ALIGNMENT) * ALIGNMENT
+    return offsets, offset
+
+
+def _map_views(buffer, capacity): #vistas NumPy sobre el segmento, sin copias
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+    offsets, _ = get_layout(capacity)
+    arrays = {
+        name: np.ndarray((capacity,) + shape, dtype=dtype, buffer=buffer, offset=offsets[name])
+        for name, dtype, shape in ARRAY_FIELDS
+    }
+    return header, arrays
+
+
+class SharedStateWriter: #crea el segmento y publica el estado en él
+
+    def __init__(self, name=None, capacity=1024):
+        _, size = get_layout(capacity)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        self.capacity = capacity
+
+        self.header, self.arrays = _map_views(self.shm.buf, capacity)
+        self.header["magic"] = MAGIC
+        self.header["version"] = LAYOUT_VERSION
+        self.header["capacity"] = capacity
+        self.header["count"] = 0
+        self.header["seq"] = 0
+        self.header["frame"] = 0
+
+    def publish(self, bubbles, frame=None): #escribe las burbujas (se truncan a capacity)
+        count = min(len(bubbles), self.capacity)
+        bubbles = bubbles[:count]
+        arrays = self.arrays
+
+        self.header["seq"] += 1 #impar: escritura en curso
+        try:
+            if count:
+                arrays["ids"][:count] = [b.id for b in bubbles]
+                arrays["positions"][:count] = [b.position for b in bubbles]
+                arrays["speeds"][:count] = [b.speed for b in bubbles]
+                arrays["radii"][:count] = [b.radius for b in bubbles]
+                arrays["strengths"][:count] = [b.metaball_strength for b in bubbles]
+                arrays["colors"][:count] = [b.color for b in bubbles]
+            self.header["count"] = count
+            self.header["frame"] = self.header["frame"] + 1 if frame is None else frame
+        except BaseException:
+            self.header["count"] = 0 #lo escrito a medias no es un estado válido
+            raise
+        finally:
+            self.header["seq"] += 1 #par: consistente (si no, los lectores esperarían para siempre)
+
+    def close(self, unlink=True):
+        #soltar las vistas antes de cerrar, si no SharedMemory.close falla
+        self.header = None
+        self.arrays = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class SharedStateReader: #se conecta a un segmento existente desde otro proceso
+
+    def __init__(self, name):
+        if sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            #el resource_tracker borraría el segmento al salir el lector; no es suyo
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if bytes(header["magic"]) != MAGIC:
+            raise ValueError(f"{name} no es un segmento de estado de burbujas")
+        if int(header["version"]) != LAYOUT_VERSION:
+            raise ValueError(f"Versión de layout no soportada: {int(header['version'])}")
+
+        self.capacity = int(header["capacity"])
+        self.header, self.arrays = _map_views(self.shm.buf, self.capacity)
+
+    def read(self, consumer, timeout=1.0): #llama consumer(frame, vistas) con datos consistentes
+        #las vistas no son copias: consumer debe terminar de usarlas antes de retornar.
+        #si el escritor publicó mientras tanto, se descarta el resultado y se reintenta
+        deadline = time.perf_counter() + timeout
+        while True:
+            start = int(self.header["seq"])
+            if start % 2 == 0:
+                count = int(self.header["count"])
+                frame = int(self.header["frame"])
+                result = consumer(frame, {name: array[:count] for name, array in self.arrays.items()})
+                if int(self.header["seq"]) == start:
+                    return result
+            if time.perf_counter() > deadline:
+                raise TimeoutError("No se pudo obtener un snapshot consistente")
+            time.sleep(0) #ceder el CPU al escritor
+
+    def snapshot(self, timeout=1.0): #copia consistente: (frame, dict de arrays)
+        return self.read(
+            lambda frame, views: (frame, {name: view.copy() for name, view in views.items()}),
+            timeout,
+        )
+
+    def close(self):
+        self.header = None
+        self.arrays = None
+        self.shm.close()
@@ -1,11 +1,48 @@
 import numpy as np
 import random
-from .bubble_agent import Bubble
+from .bubble_agent import Bubble, FLOTAGE_FORCE
+from .wind_field import WindField
+from .shared_state import SharedStateWriter
+from .event_log import EventLog
+from .physics import create_physics, sweep_and_prune, DRAG_COEFFICIENT
+from .lifecycle import LifecycleScheduler
+
+
+#colores bonitos y aleatorios :D
+BUBBLE_COLORS = np.array([
+    [0.2, 0.8, 1.0],  # celeste
+    [0.1, 1.0, 0.7],  # turquesa
+    [0.9, 0.2, 1.0],  # morado
+    [0.2, 1.0, 0.2],  # verde
+    [1.0, 0.7, 0.1],  # naranjo
+    [1.0, 0.2, 0.5],  # rosado
+], dtype=np.float32)
+
+SPAWN_PATTERNS = ("scatter", "around", "ring", "fragments")
+
+
+def _lerp(u, low, high): #escala una columna de uniformes [0, 1) al rango [low, high)
+    return low + u * (high - low)
+
+
+def _polar(angle, magnitude): #vectores (N, 2) a partir de ángulos y magnitudes
+    return np.stack([np.cos(angle), np.sin(angle)], axis=1) * magnitude[:, None]
+
+
+def _pick_colors(u): #elige colores de BUBBLE_COLORS a partir de una columna de uniformes
+    return BUBBLE_COLORS[(u * len(BUBBLE_COLORS)).astype(int)]
 
 
 class BubbleSimulation: #"mundo" que define y gestiona la simulación de las burbujas
     
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None, physics="python"):
+        #con seed la simulación es reproducible (los generadores son globales)
+        self.seed = seed
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+
+        #tamaño del mundo, independiente del tamaño de la ventana (ver Camera)
         self.width = width
         self.height = height
         self.bubbles = []
@@ -16,6 +53,9 @@ class BubbleSimulation: #"mundo" que define y gestiona la simulación de las bur
         self.air_resistance = 0.01
         self.spawn_rate = 0.08
         self.max_bubbles = 125
+        self.turbulence_scale = 1.0  #multiplica la turbulencia random
+        self.split_chance = 0.3  #probabilidad de división al cumplir las condiciones
+        self.collision_interval = 1  #colisiones cada N frames (ver QualityGovernor)
         
         #repulsión del mouse
         self.mouse_repulsion_strength = 15000.0
@@ -25,48 +65,187 @@ class BubbleSimulation: #"mundo" que define y gestiona la simulación de las bur
         self.wind_strength = 30.0
         self.wind_direction = np.array([1, 0])
         self.wind_change_timer = 0
+        #variación espacial del viento (remolinos), se suma a la dirección global
+        self.wind_field = WindField(width, height)
+
+        #región de interés (normalmente lo visible por la cámara): fuera de ella
+        #las burbujas se simulan solo cada offscreen_interval frames
+        self.focus_bounds = None  #(x_min, y_min, x_max, y_max) o None
+        self.focus_margin = 100.0
+        self.offscreen_interval = 1  #1 = todas las burbujas en cada frame
+        #el escalonado usa ids relativos a esta simulación: el contador de Bubble es del
+        #proceso y un replay en el mismo proceso parte de otro id
+        self.id_base = next(Bubble._id_counter)
+        self.frame_index = 0
+        self.skipped_offscreen = 0
+
+        #islas dormidas: grupos de burbujas en contacto que se mantienen calmados
+        #sleep_delay segundos dejan de simularse hasta que algo los despierta. Calmado se
+        #mide respecto a la velocidad media de la isla, así una isla que el viento arrastra
+        #entera también se duerme; dormida deriva en bloque (ver update_drifts)
+        self.sleep_enabled = True
+        self.sleep_speed = 25.0  #rapidez relativa media bajo la cual una isla se considera calmada
+        self.sleep_delay = 1.0
+        self.sleep_min_members = 2  #una burbuja sola no es una isla asentada
+        self.gust_wake_strength = 40.0  #cambios de viento desde esta fuerza despiertan todo
+        self.drifts = []  #(velocidad compartida, factor de viento, flotación) de cada isla dormida
+        self.island_interval = 6  #frames entre pasadas de islas (dormirse no necesita precisión de frame)
+        self.island_count = 0
+        self.sleeping_count = 0
+        self._island_dt = 0.0  #tiempo acumulado desde la última pasada
+
+        #instrumentación opcional de asignaciones (ver alloc_profile.AllocationProfiler)
+        self.profiler = None
+
+        #dirty: algo se movió, apareció o desapareció desde el último consume_dirty
+        #(permite no redibujar ni gastar CPU cuando la escena está quieta)
+        self.dirty = True
+
+        #exportación opcional del estado a memoria compartida (ver shared_state.py)
+        self.shared_state = None
+
+        #expiraciones y permisos de división agendados, desalojo de las más viejas
+        self.lifecycle = LifecycleScheduler()
+
+        #backend de la física por frame (ver physics.PHYSICS_BACKENDS)
+        self.physics = create_physics(physics)
+
+        #eventos tipados (spawn, explosiones, divisiones...), se escriben fuera de este hilo
+        self.events = EventLog()
         
     def update_mouse_position(self, mouse_x, mouse_y): #actualizar posición del mouse para efecto de repulsión
         self.mouse_pos = np.array([mouse_x, mouse_y])
         
-    def add_bubble(self, x=None, y=None, radius=None, speed=None): #añadir burbuja
-        if x is None:
-            x = random.uniform(50, self.width - 50)
-        if y is None:
-            y = random.uniform(50, self.height - 50)
-        if radius is None:
-            radius = random.uniform(20, 40)
-        if speed is None:
-            speed = np.array([
-                random.uniform(-150, 150),
-                random.uniform(-100, 150)
-            ])
-        
-        position = np.array([x, y], dtype=float)
-        
-        #colores bonitos y aleatorios :D
-        colors = [
-            [0.2, 0.8, 1.0],  # celeste
-            [0.1, 1.0, 0.7],  # turquesa
-            [0.9, 0.2, 1.0],  # morado
-            [0.2, 1.0, 0.2],  # verde
-            [1.0, 0.7, 0.1],  # naranjo
-            [1.0, 0.2, 0.5],  # rosado
+    def spawn_bubbles(
+        self,
+        positions,
+        speeds,
+        radii,
+        colors=None,
+        lifetimes=None,
+        min_radius=5.0,
+        max_speed=400.0,
+        density=200.0,
+    ): #inserta N burbujas de una vez a partir de arrays
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        count = len(positions)
+        speeds = np.broadcast_to(np.asarray(speeds, dtype=float), (count, 2))
+        radii = np.broadcast_to(np.asarray(radii, dtype=float), (count,))
+
+        #lo que no viene dado se sortea en un solo llamado
+        if colors is None or lifetimes is None:
+            u = np.random.random((count, 2))
+            if colors is None:
+                colors = _pick_colors(u[:, 0])
+            if lifetimes is None:
+                lifetimes = _lerp(u[:, 1], 60, 120)
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.float32), (count, 3))
+        lifetimes = np.broadcast_to(np.asarray(lifetimes, dtype=float), (count,))
+
+        new_bubbles = [
+            Bubble(
+                radius=float(radii[i]),
+                position=positions[i],
+                speed=speeds[i],
+                min_radius=min_radius,
+                max_speed=max_speed,
+                mode="split",
+                density=density,
+                color=colors[i],
+                lifetime=float(lifetimes[i]),
+            )
+            for i in range(count)
         ]
-        
-        bubble = Bubble(
-            radius=radius,
-            position=position,
-            speed=speed,
-            min_radius=5.0,
-            max_speed=400.0,
-            mode="split",
-            density=200.0,
-            color=random.choice(colors)
-        )
-        
-        self.bubbles.append(bubble)
-        return bubble
+
+        self.bubbles.extend(new_bubbles)
+        for bubble in new_bubbles:
+            self.lifecycle.add(bubble)
+        if new_bubbles:
+            self.dirty = True
+            self.events.emit("spawn", self.frame_index, count=count, first_id=new_bubbles[0].id)
+        return new_bubbles
+
+    def spawn_pattern(self, pattern, count=None, **params): #spawnea según un patrón de SPAWN_PATTERNS
+        if pattern not in SPAWN_PATTERNS:
+            raise ValueError(f"Patrón de spawn desconocido: {pattern}")
+        return self.spawn_bubbles(**getattr(self, f"_pattern_{pattern}")(count, **params))
+
+    def _pattern_scatter(self, count=1): #burbujas repartidas por todo el mundo
+        count = 1 if count is None else count
+        u = np.random.random((count, 7))
+        return {
+            'positions': np.stack([
+                _lerp(u[:, 0], 50, self.width - 50),
+                _lerp(u[:, 1], 50, self.height - 50),
+            ], axis=1),
+            'speeds': np.stack([_lerp(u[:, 2], -150, 150), _lerp(u[:, 3], -100, 150)], axis=1),
+            'radii': _lerp(u[:, 4], 20, 40),
+            'colors': _pick_colors(u[:, 5]),
+            'lifetimes': _lerp(u[:, 6], 60, 120),
+        }
+
+    def _pattern_around(self, count=1, center=(0, 0)): #burbujas alrededor de un punto que se alejan de él
+        count = 1 if count is None else count
+        u = np.random.random((count, 7))
+        offset = _polar(_lerp(u[:, 0], 0, 2 * np.pi), _lerp(u[:, 1], 30, 60))
+
+        away_velocity = offset * 3
+        base_velocity = np.stack([_lerp(u[:, 2], -50, 50), _lerp(u[:, 3], -25, 75)], axis=1)
+        return {
+            'positions': np.asarray(center, dtype=float) + offset,
+            'speeds': away_velocity + base_velocity,
+            'radii': _lerp(u[:, 4], 25, 35),
+            'colors': _pick_colors(u[:, 5]),
+            'lifetimes': _lerp(u[:, 6], 60, 120),
+        }
+
+    def _pattern_ring(self, count=10, center=(0, 0)): #patrón circular de explosión
+        count = 10 if count is None else count
+        u = np.random.random((count, 6))
+        angle = (2 * np.pi * np.arange(count)) / count + _lerp(u[:, 0], -0.3, 0.3)
+        return {
+            'positions': np.asarray(center, dtype=float) + _polar(angle, _lerp(u[:, 1], 40, 100)),
+            'speeds': _polar(angle, _lerp(u[:, 2], 200, 350)),
+            'radii': _lerp(u[:, 3], 15, 30),
+            'colors': _pick_colors(u[:, 4]),
+            'lifetimes': _lerp(u[:, 5], 60, 120),
+        }
+
+    def _pattern_fragments(self, count=None, center=(0, 0), parent_radius=30.0, parent_color=None):
+        #fragmentos de una burbuja que explota, con el color de la original
+        if count is None:
+            count = np.random.randint(4, 9) #número de fragmentos
+        u = np.random.random((count, 9))
+        if parent_color is None:
+            parent_color = BUBBLE_COLORS[0]
+
+        #posición random alrededor del punto de explosión, e impulso inicial
+        offset = _polar(_lerp(u[:, 0], 0, 2 * np.pi), _lerp(u[:, 1], 0, parent_radius * 1.5))
+        speed = _polar(_lerp(u[:, 2], 0, 2 * np.pi), _lerp(u[:, 3], 150, 300))
+
+        #color original con pequeña variación
+        colors = np.clip(np.asarray(parent_color, dtype=np.float32) + _lerp(u[:, 5:8], -0.1, 0.1), 0.0, 1.0)
+        return {
+            'positions': np.asarray(center, dtype=float) + offset,
+            'speeds': speed,
+            'radii': _lerp(u[:, 4], 5, parent_radius * 0.4),
+            'colors': colors,
+            'lifetimes': _lerp(u[:, 8], 60, 120),
+            'min_radius': 3.0,
+            'density': 150.0,  #fragmentos ligeros
+        }
+
+    def add_bubble(self, x=None, y=None, radius=None, speed=None): #añadir burbuja
+        spawn = self._pattern_scatter(1)
+        if x is not None:
+            spawn['positions'][0, 0] = x
+        if y is not None:
+            spawn['positions'][0, 1] = y
+        if radius is not None:
+            spawn['radii'][0] = radius
+        if speed is not None:
+            spawn['speeds'][0] = speed
+        return self.spawn_bubbles(**spawn)[0]
     
     def apply_mouse_repulsion(self, bubble): #aplicar repulsión
         to_bubble = bubble.position - self.mouse_pos
@@ -98,19 +277,161 @@ class BubbleSimulation: #"mundo" que define y gestiona la simulación de las bur
                 bubble.speed = (bubble.speed / speed_magnitude) * bubble.max_speed
     
     def apply_wind_effect(self, bubble, dt): #efecto de viento para movimiento más realista
-        wind_effect = self.wind_strength * (1.0 + 20.0 / bubble.radius) #las más pequeñas son más afectadas
-        wind_force = self.wind_direction * wind_effect
+        #una sola burbuja; update usa get_wind_accelerations para todas a la vez
+        wind_force = self.get_wind_accelerations(bubble.position, bubble.radius)[0]
         
         #aplicar la fuerza
         bubble.speed += wind_force * dt
+
+    def get_wind_accelerations(self, positions, radii): #viento global + campo, (N, 2)
+        wind = self.wind_field.sample(positions)
+        wind += self.wind_direction * self.wind_strength
+        #las más pequeñas son más afectadas
+        wind *= (1.0 + 20.0 / np.asarray(radii, dtype=float).reshape(-1))[:, None]
+        return wind
     
     def update_wind(self, dt): #actualiza dirección y fuerza del viento
+        self.wind_field.update(dt, self.wind_direction * self.wind_strength)
         self.wind_change_timer += dt
         if self.wind_change_timer > 2.0:  #lo modifica viento cada 2 segundos
             angle = random.uniform(0, 2 * np.pi) #dirección random
             self.wind_direction = np.array([np.cos(angle), np.sin(angle)])
             self.wind_strength = random.uniform(20, 50)
             self.wind_change_timer = 0
+
+            if self.wind_strength >= self.gust_wake_strength: #ráfaga fuerte
+                self.wake_all()
+
+    def wake_all(self): #despierta todas las burbujas
+        self.drifts = []
+        if not self.sleeping_count:
+            return
+        for bubble in self.bubbles:
+            if bubble.sleeping:
+                bubble.wake()
+        self.sleeping_count = 0
+
+    def update_drifts(self, dt): #mueve la velocidad de cada isla dormida como un solo cuerpo
+        #viento global, flotación y arrastre sobre la velocidad que comparten sus burbujas
+        #(la turbulencia se promedia y el campo de viento se ignora)
+        if not self.drifts:
+            return
+        wind = self.wind_direction * self.wind_strength
+        for drift, wind_factor, lift in self.drifts:
+            drift += (wind * wind_factor + lift - DRAG_COEFFICIENT * drift * np.sqrt(drift @ drift)) * dt
+
+    def wake_region(self, center, radius): #despierta burbujas dormidas dentro del radio
+        sleepers = [b for b in self.bubbles if b.sleeping]
+        if not sleepers:
+            return
+        positions = np.array([b.position for b in sleepers])
+        reach = radius + np.array([b.radius for b in sleepers])
+        distance2 = np.sum((positions - np.asarray(center, dtype=float)) ** 2, axis=1)
+        for bubble in np.array(sleepers, dtype=object)[distance2 <= reach * reach]:
+            bubble.wake()
+
+    def find_islands(self, positions=None, radii=None): #agrupa las burbujas en contacto, retorna etiquetas 0..k-1
+        count = len(self.bubbles)
+        if positions is None:
+            positions = np.array([b.position for b in self.bubbles], dtype=float).reshape(count, 2)
+        if radii is None:
+            radii = np.array([b.radius for b in self.bubbles], dtype=float)
+
+        #sweep and prune en x: solo se comparan pares cuya separación en x permite contacto
+        first, second = sweep_and_prune(positions, radii)
+
+        diff = positions[first] - positions[second]
+        reach = radii[first] + radii[second]
+        touching = np.einsum('ij,ij->i', diff, diff) <= reach * reach
+        first, second = first[touching], second[touching]
+
+        #propagación del menor índice por los contactos + salto de punteros, sin loops de
+        #Python: cada burbuja termina con el menor índice de su isla
+        roots = np.arange(count)
+        while len(first):
+            low = np.minimum(roots[first], roots[second])
+            merged = roots.copy()
+            np.minimum.at(merged, first, low)
+            np.minimum.at(merged, second, low)
+            merged = merged[merged]
+            if np.array_equal(merged, roots):
+                break
+            roots = merged
+        return np.unique(roots, return_inverse=True)[1].reshape(count)
+
+    def update_islands(self, dt, positions=None, radii=None): #decide qué islas duermen y cuáles despiertan
+        #positions/radii: arrays de update, para no volver a armarlos
+        if not self.sleep_enabled or not self.bubbles:
+            self.wake_all()
+            self.island_count = 0
+            self._island_dt = 0.0
+            return
+
+        #una pasada cada island_interval frames, con el dt acumulado
+        self._island_dt += dt
+        if self.frame_index % self.island_interval:
+            return
+        dt, self._island_dt = self._island_dt, 0.0
+        if radii is None:
+            radii = np.array([b.radius for b in self.bubbles], dtype=float)
+
+        #el mouse despierta lo que está dentro de su radio de repulsión
+        self.wake_region(self.mouse_pos, self.mouse_repulsion_radius)
+
+        sleeping = np.array([b.sleeping for b in self.bubbles])
+        #deriva de islas que ya no tienen burbujas dormidas (despertadas o eliminadas)
+        shared = {id(b.speed) for b, asleep in zip(self.bubbles, sleeping) if asleep}
+        self.drifts = [entry for entry in self.drifts if id(entry[0]) in shared]
+        if sleeping.all(): #nada se mueve fuera de las islas dormidas: nada que decidir
+            return
+
+        labels = self.find_islands(positions, radii)
+        island_count = int(labels.max()) + 1
+        members = np.bincount(labels, minlength=island_count)
+
+        #energía cinética por unidad de masa relativa a la velocidad media de la isla:
+        #lo que importa es el movimiento interno, no que la isla entera derive
+        speeds = np.array([b.speed for b in self.bubbles], dtype=float)
+        mean_speed = np.empty((island_count, 2))
+        mean_speed[:, 0] = np.bincount(labels, weights=speeds[:, 0], minlength=island_count) / members
+        mean_speed[:, 1] = np.bincount(labels, weights=speeds[:, 1], minlength=island_count) / members
+        speeds -= mean_speed[labels]
+        energy = 0.5 * np.einsum('ij,ij->i', speeds, speeds)
+        calm_time = np.array([b.calm_time for b in self.bubbles])
+
+        #un miembro despierto (p.ej. un contacto nuevo) despierta a toda la isla
+        island_awake = np.bincount(labels, weights=~sleeping, minlength=island_count) > 0
+        island_energy = np.bincount(labels, weights=energy, minlength=island_count) / members
+
+        island_calm = np.full(island_count, np.inf)
+        np.minimum.at(island_calm, labels, calm_time)
+        calm = (island_energy < 0.5 * self.sleep_speed ** 2) & (members >= self.sleep_min_members)
+        island_calm = np.where(calm, island_calm + dt, 0.0)
+        falls_asleep = island_awake & (island_calm >= self.sleep_delay)
+
+        #cada isla que se duerme comparte un vector de velocidad entre sus burbujas
+        drifts = {}
+        if falls_asleep.any():
+            wind_factor = np.bincount(labels, weights=1.0 + 20.0 / radii, minlength=island_count) / members
+            inverse_weight = np.array([1.0 / b.weight for b in self.bubbles])
+            lift = np.bincount(labels, weights=inverse_weight, minlength=island_count) / members
+            for label in np.flatnonzero(falls_asleep).tolist():
+                drift = mean_speed[label].copy()
+                drifts[label] = drift
+                self.drifts.append((drift, wind_factor[label], FLOTAGE_FORCE * lift[label]))
+
+        for bubble, label in zip(self.bubbles, labels.tolist()):
+            if not island_awake[label]:
+                continue #isla que sigue dormida
+            if bubble.sleeping: #isla con un contacto despierto
+                bubble.wake()
+            bubble.calm_time = island_calm[label]
+            if falls_asleep[label]:
+                bubble.sleeping = True
+                bubble.speed = drifts[label]
+
+        self.island_count = island_count
+        self.sleeping_count = int(np.sum(falls_asleep[labels] | ~island_awake[labels]))
     
     def find_bubble_at_position(self, x, y): #encuentra burbuja en la posición dada
         point = np.array([x, y])
@@ -134,149 +455,178 @@ class BubbleSimulation: #"mundo" que define y gestiona la simulación de las bur
             #remover burbuja original
             if bubble in self.bubbles:
                 self.bubbles.remove(bubble)
+                self.lifecycle.remove(bubble)
+                self.dirty = True
             
-            print(f"Burbuja explotada en ({x:.0f}, {y:.0f})")
+            self.events.emit("explode", self.frame_index, id=bubble.id, x=x, y=y, radius=bubble.radius)
             return True
         return False
     
     def create_explosion_at_position(self, position, original_radius, original_color):
         #crea explosión de burbujas en la posición dada
-        fragment_count = random.randint(4, 8) #número de fragmentos
-        
-        for _ in range(fragment_count):
-            #posición random alrededor del punto de explosión
-            angle = random.uniform(0, 2 * np.pi)
-            distance = random.uniform(0, original_radius * 1.5)
-            offset = np.array([
-                np.cos(angle) * distance,
-                np.sin(angle) * distance
-            ])
-            fragment_pos = position + offset
-            
-            #impulso inicial
-            explosion_angle = random.uniform(0, 2 * np.pi)
-            explosion_speed = random.uniform(150, 300)
-            fragment_speed = np.array([
-                np.cos(explosion_angle) * explosion_speed,
-                np.sin(explosion_angle) * explosion_speed
-            ])
-            
-            #fragmento con un poco de variación de radio
-            fragment_radius = random.uniform(5, original_radius * 0.4)
-            
-            #usar color original con pequeña variación
-            fragment_color = original_color.copy()
-            color_variation = np.random.uniform(-0.1, 0.1, 3)
-            fragment_color += color_variation
-            fragment_color = np.clip(fragment_color, 0.0, 1.0)  #Mantener en rango válido
-            
-            fragment = Bubble(
-                radius=fragment_radius,
-                position=fragment_pos,
-                speed=fragment_speed,
-                min_radius=3.0,
-                max_speed=400.0,
-                mode="split",
-                density=150.0,  #fragmentos ligeros
-                color=fragment_color
-            )
-            
-            self.bubbles.append(fragment)
+        self.wake_region(position, original_radius * 1.5 + 50)
+        return self.spawn_pattern(
+            "fragments",
+            center=position,
+            parent_radius=original_radius,
+            parent_color=original_color,
+        )
     
+    def get_offscreen_mask(self, positions=None): #máscara de burbujas fuera de la región de interés (o None)
+        if self.focus_bounds is None or self.offscreen_interval <= 1 or not self.bubbles:
+            return None
+        if positions is None:
+            positions = np.array([b.position for b in self.bubbles])
+        x_min, y_min, x_max, y_max = self.focus_bounds
+        margin = self.focus_margin
+        return (
+            (positions[:, 0] < x_min - margin)
+            | (positions[:, 0] > x_max + margin)
+            | (positions[:, 1] < y_min - margin)
+            | (positions[:, 1] > y_max + margin)
+        )
+
     def update(self, dt): #actualizar la simulación!
+        profiler = self.profiler
+        if profiler:
+            profiler.switch("viento")
 
         self.update_wind(dt) #actualizar viento
 
-        alive_bubbles = [] #actualizar burbujas
-        new_bubbles = []
-        
-        for bubble in self.bubbles:
-            self.apply_mouse_repulsion(bubble)
-            
-            self.apply_wind_effect(bubble, dt)
+        new_bubbles = [] #burbujas que surgen de las divisiones
 
-            turbulence = np.array([   #turbulencia random
-                random.uniform(-50, 50),
-                random.uniform(-25, 25)
-            ])
-            bubble.speed += turbulence * dt
+        self.frame_index += 1
+        self.skipped_offscreen = 0
+        positions = np.array([b.position for b in self.bubbles], dtype=float).reshape(-1, 2)
+        radii = np.array([b.radius for b in self.bubbles], dtype=float)
+        offscreen = self.get_offscreen_mask(positions)
 
-            is_alive = bubble.update_pos(self.bubbles, dt)
-            
-            if is_alive:
+        if profiler:
+            profiler.switch("islas")
+        self.update_islands(dt, positions, radii)
+        self.update_drifts(dt)
+
+        #viento de todas las burbujas en una sola pasada
+        if profiler:
+            profiler.switch("viento")
+        wind = self.get_wind_accelerations(positions, radii)
+        collide = self.frame_index % self.collision_interval == 0
+
+        active = [] #índices de las burbujas que se simulan en este frame
+        dts = []
+        alive = [True] * len(self.bubbles)
+        for i, bubble in enumerate(self.bubbles):
+            if bubble.sleeping: #isla dormida: solo envejece
+                alive[i] = bubble.update_asleep(dt)
+                continue
+
+            #fuera de la región de interés: acumular dt y actualizar en frames alternados
+            #(escalonados por id para repartir el trabajo entre frames)
+            if offscreen is not None and offscreen[i] and (self.frame_index + bubble.id - self.id_base) % self.offscreen_interval:
+                bubble.pending_dt += dt
+                self.skipped_offscreen += 1
+                continue
+            active.append(i)
+            dts.append(dt + bubble.pending_dt)
+            bubble.pending_dt = 0.0
+
+        if active:
+            #fuerzas, integración, colisiones, marcas de división y muertes físicas (ver physics.py)
+            for i, is_alive in zip(active, self.physics.step(self, active, dts, wind[active], collide)):
+                alive[i] = is_alive
+            self.dirty = True
+
+        #expiración por edad: solo las burbujas cuyo evento venció
+        if profiler:
+            profiler.switch("ciclo de vida")
+        if not self.lifecycle.is_synced(self.bubbles): #la lista se modificó por fuera
+            self.lifecycle.sync(self.bubbles)
+        expired = {bubble.id for bubble in self.lifecycle.advance(dt)}
+
+        alive_bubbles = []
+        for bubble, is_alive in zip(self.bubbles, alive):
+            if bubble.id in expired:
+                self.events.emit("expire", self.frame_index, id=bubble.id, reason="vida")
+            elif is_alive:
                 alive_bubbles.append(bubble)
-                
-                if hasattr(bubble, 'to_split') and bubble.to_split: #chequear si debería dividirse
-                    new_bubble = bubble.split()
-                    if new_bubble:
-                        new_bubbles.append(new_bubble)
-        
+            else:
+                self.lifecycle.remove(bubble)
+                self.events.emit("expire", self.frame_index, id=bubble.id, reason="física")
+
+        for i in active:
+            bubble = self.bubbles[i]
+            if alive[i] and bubble.id not in expired and bubble.to_split: #chequear si debería dividirse
+                if profiler:
+                    profiler.switch("divisiones")
+                new_bubble = bubble.split()
+                if new_bubble:
+                    new_bubbles.append(new_bubble)
+                    self.lifecycle.on_split(bubble)
+                    self.lifecycle.add(new_bubble)
+                    self.events.emit("split", self.frame_index, id=bubble.id, child=new_bubble.id)
+
         #añadir burbujas que surgieron de las divisiones
+        if len(alive_bubbles) != len(self.bubbles): #alguna burbuja murió (incluso dormida)
+            self.dirty = True
         self.bubbles = alive_bubbles + new_bubbles
         
         #spawnear burbujas random
+        if profiler:
+            profiler.switch("spawn")
         if (len(self.bubbles) < self.max_bubbles and 
             random.random() < self.spawn_rate * dt):
             self.add_bubble()
         #la segunda condición da una probabilidad constante indep. de los fps, usada en muchas sim. a tiempo real :D
 
-        #limitar total de burbujas
-        if len(self.bubbles) > self.max_bubbles:
-            #eliminar las más viejas
-            self.bubbles.sort(key=lambda b: getattr(b, 'age', 0))
-            self.bubbles = self.bubbles[:self.max_bubbles]
+        #limitar total de burbujas: se desalojan solo las k más viejas, sin ordenar
+        if profiler:
+            profiler.switch("límite")
+        excess = len(self.bubbles) - self.max_bubbles
+        if excess > 0:
+            evicted = {bubble.id for bubble in self.lifecycle.evict(excess)}
+            for bubble_id in evicted:
+                self.events.emit("expire", self.frame_index, id=bubble_id, reason="límite")
+            self.bubbles = [bubble for bubble in self.bubbles if bubble.id not in evicted]
+            self.dirty = True
+        if self.shared_state is not None:
+            if profiler:
+                profiler.switch("memoria compartida")
+            self.shared_state.publish(self.bubbles, self.frame_index)
+
+        if profiler:
+            profiler.switch(None)
     
     def add_bubble_at_mouse(self, mouse_x, mouse_y): #añadir burbuja en la posición del mouse
         #añadir offset, y se aleja del cursor
-        offset_angle = random.uniform(0, 2 * np.pi)
-        offset_distance = random.uniform(30, 60)
-        offset = np.array([
-            np.cos(offset_angle) * offset_distance,
-            np.sin(offset_angle) * offset_distance
-        ])
-    
-        away_velocity = offset * 3
-        base_velocity = np.array([
-            random.uniform(-50, 50),
-            random.uniform(-25, 75)
-        ])
-        
-        bubble = self.add_bubble(
-            mouse_x + offset[0], 
-            mouse_y + offset[1],
-            radius=random.uniform(25, 35),
-            speed=away_velocity + base_velocity
-        )
-        
-        return bubble
+        return self.spawn_pattern("around", 1, center=(mouse_x, mouse_y))[0]
     
     def add_bubble_explosion(self, mouse_x, mouse_y, count=10): #explosión de burbujas
-        for i in range(count):
-            #patrón circular de explosión
-            angle = (2 * np.pi * i) / count + random.uniform(-0.3, 0.3)
-            distance = random.uniform(40, 100)
-            
-            pos_x = mouse_x + np.cos(angle) * distance
-            pos_y = mouse_y + np.sin(angle) * distance
-            
-            #impulso de velocidad
-            speed_magnitude = random.uniform(200, 350)
-            speed = np.array([
-                np.cos(angle) * speed_magnitude,
-                np.sin(angle) * speed_magnitude
-            ])
-            
-            self.add_bubble(
-                pos_x,
-                pos_y,
-                radius=random.uniform(15, 30),
-                speed=speed
-            )
+        self.wake_region((mouse_x, mouse_y), 150)
+        return self.spawn_pattern("ring", count, center=(mouse_x, mouse_y))
     
     def clear_bubbles(self): #elimina todas las burbujas
+        if self.bubbles:
+            self.dirty = True
+        self.events.emit("clear", self.frame_index, count=len(self.bubbles))
         self.bubbles.clear()
-        print("Todas las burbujas han sido eliminadas")
+        self.lifecycle.clear()
     
+    def enable_shared_state(self, name=None, capacity=1024): #publica el estado en cada update
+        self.disable_shared_state()
+        self.shared_state = SharedStateWriter(name, capacity)
+        self.shared_state.publish(self.bubbles, self.frame_index)
+        return self.shared_state.name
+
+    def disable_shared_state(self):
+        if self.shared_state is not None:
+            self.shared_state.close()
+            self.shared_state = None
+
+    def consume_dirty(self): #retorna si hubo cambios desde la última llamada y limpia la marca
+        dirty = self.dirty
+        self.dirty = False
+        return dirty
+
     def get_bubble_count(self): #entrega número actual de burbujas
         return len(self.bubbles)
     
@@ -286,16 +636,25 @@ class BubbleSimulation: #"mundo" que define y gestiona la simulación de las bur
                 'total burbujas': 0,
                 'radio promedio': 0,
                 'rapidez promedio': 0,
-                'energía total': 0
+                'energía total': 0,
+                'burbujas despiertas': 0,
+                'burbujas dormidas': 0,
+                'islas': 0,
+                'eventos programados': self.lifecycle.get_pending_count()
             }
         
         total_radius = sum(b.radius for b in self.bubbles)
         total_speed = sum(b.get_norm_speed() if hasattr(b, 'get_norm_speed') else np.linalg.norm(b.speed) for b in self.bubbles)
         total_energy = sum(getattr(b, 'remaining_energy', 0) for b in self.bubbles)
+        sleeping = sum(b.sleeping for b in self.bubbles) #sleeping_count solo se recalcula en cada pasada de islas
         
         return {
             'total burbujas': len(self.bubbles),
             'radio promedio': total_radius / len(self.bubbles),
             'rapidez promedio': total_speed / len(self.bubbles),
-            'energía total': total_energy
+            'energía total': total_energy,
+            'burbujas despiertas': len(self.bubbles) - sleeping,
+            'burbujas dormidas': sleeping,
+            'islas': self.island_count,
+            'eventos programados': self.lifecycle.get_pending_count()
         }
\ No newline at end of file
@@ -0,0 +1,468 @@
+import asyncio
+import struct
+import threading
+import time
+
+import numpy as np
+
+
+#Formato de los frames (todo little-endian):
+#   [longitud u32][header][spawns][muertes][posiciones][radios][fuerzas]
+#
+#   header:     magic "BSIM", flags u8, frame u32 y la cantidad de registros de cada sección (u32)
+#   spawns:     id u4, x i4, y i4, radio i4, fuerza i4, color 3 x u1 (valores absolutos cuantizados)
+#   muertes:    id u4
+#   posiciones: id u4, dx i4, dy i4 (deltas respecto al último frame enviado a ese cliente)
+#   radios:     id u4, delta i4
+#   fuerzas:    id u4, delta i4
+#
+#En un keyframe (flags & FRAME_KEYFRAME) todas las burbujas van como spawns y el
+#cliente descarta su estado anterior
+
+MAGIC = b"BSIM"
+FRAME_KEYFRAME = 0x01
+
+POSITION_SCALE = 8.0  #1/8 de pixel
+RADIUS_SCALE = 64.0
+STRENGTH_SCALE = 4.0
+
+_LENGTH = struct.Struct("<I")
+_HEADER = struct.Struct("<4sBIIIIII")
+
+SPAWN_DTYPE = np.dtype([
+    ("id", "<u4"),
+    ("x", "<i4"),
+    ("y", "<i4"),
+    ("radius", "<i4"),
+    ("strength", "<i4"),
+    ("color", "u1", (3,)),
+])
+DEATH_DTYPE = np.dtype("<u4")
+POSITION_DTYPE = np.dtype([("id", "<u4"), ("dx", "<i4"), ("dy", "<i4")])
+SCALAR_DTYPE = np.dtype([("id", "<u4"), ("delta", "<i4")])
+
+_SCALES = np.array([POSITION_SCALE, POSITION_SCALE, RADIUS_SCALE, STRENGTH_SCALE])
+
+
+class StateSnapshot: #estado cuantizado de la simulación, ordenado por id
+
+    def __init__(self, frame, ids, values, colors):
+        self.frame = frame
+        self.ids = ids        #(N,) uint32
+        self.values = values  #(N, 4) int32: x, y, radio, fuerza
+        self.colors = colors  #(N, 3) uint8
+
+
+def capture_state(bubbles, frame=0): #cuantiza las burbujas una sola vez para todos los clientes
+    count = len(bubbles)
+    ids = np.fromiter((b.id for b in bubbles), dtype=np.uint32, count=count)
+    raw = np.array(
+        [(b.position[0], b.position[1], b.radius, b.metaball_strength) for b in bubbles],
+        dtype=np.float64,
+    ).reshape(count, 4)
+    values = np.rint(raw * _SCALES).astype(np.int32)
+    colors = np.array([b.color for b in bubbles], dtype=np.float32).reshape(count, 3)
+    colors = np.rint(np.clip(colors, 0.0, 1.0) * 255).astype(np.uint8)
+
+    order = np.argsort(ids, kind="stable")
+    return StateSnapshot(frame, ids[order], values[order], colors[order])
+
+
+def _spawn_records(snapshot, mask=None):
+    ids, values, colors = snapshot.ids, snapshot.values, snapshot.colors
+    if mask is not None:
+        ids, values, colors = ids[mask], values[mask], colors[mask]
+    records = np.empty(len(ids), dtype=SPAWN_DTYPE)
+    records["id"] = ids
+    records["x"] = values[:, 0]
+    records["y"] = values[:, 1]
+    records["radius"] = values[:, 2]
+    records["strength"] = values[:, 3]
+    records["color"] = colors
+    return records
+
+
+class DeltaEncoder: #codifica frames para un cliente, relativo a lo último que se le envió
+
+    def __init__(self, keyframe_interval=60):
+        self.keyframe_interval = keyframe_interval
+        self.ids = np.empty(0, dtype=np.uint32)
+        self.values = np.empty((0, 4), dtype=np.int32)
+        self.frames_since_keyframe = None  #None fuerza keyframe en el primer frame
+
+    def encode(self, snapshot, force_keyframe=False):
+        keyframe = (
+            force_keyframe
+            or self.frames_since_keyframe is None
+            or self.frames_since_keyframe + 1 >= self.keyframe_interval
+        )
+
+        if keyframe:
+            spawns = _spawn_records(snapshot)
+            deaths = np.empty(0, dtype=DEATH_DTYPE)
+            positions = np.empty(0, dtype=POSITION_DTYPE)
+            radii = np.empty(0, dtype=SCALAR_DTYPE)
+            strengths = np.empty(0, dtype=SCALAR_DTYPE)
+            self.frames_since_keyframe = 0
+        else:
+            #emparejar ids actuales con los enviados antes (ambos ordenados)
+            idx = np.searchsorted(self.ids, snapshot.ids)
+            clipped = np.minimum(idx, max(len(self.ids) - 1, 0))
+            known = (idx < len(self.ids)) & (self.ids[clipped] == snapshot.ids) if len(self.ids) else np.zeros(len(snapshot.ids), dtype=bool)
+
+            spawns = _spawn_records(snapshot, ~known)
+            deaths = self.ids[~np.isin(self.ids, snapshot.ids, assume_unique=True)].astype(DEATH_DTYPE)
+
+            known_ids = snapshot.ids[known]
+            delta = snapshot.values[known] - self.values[idx[known]]
+
+            moved = (delta[:, 0] != 0) | (delta[:, 1] != 0)
+            positions = np.empty(int(moved.sum()), dtype=POSITION_DTYPE)
+            positions["id"] = known_ids[moved]
+            positions["dx"] = delta[moved, 0]
+            positions["dy"] = delta[moved, 1]
+
+            radii = self._scalar_records(known_ids, delta[:, 2])
+            strengths = self._scalar_records(known_ids, delta[:, 3])
+            self.frames_since_keyframe += 1
+
+        self.ids = snapshot.ids
+        self.values = snapshot.values
+
+        header = _HEADER.pack(
+            MAGIC,
+            FRAME_KEYFRAME if keyframe else 0,
+            snapshot.frame,
+            len(spawns),
+            len(deaths),
+            len(positions),
+            len(radii),
+            len(strengths),
+        )
+        return b"".join((
+            header,
+            spawns.tobytes(),
+            deaths.tobytes(),
+            positions.tobytes(),
+            radii.tobytes(),
+            strengths.tobytes(),
+        ))
+
+    @staticmethod
+    def _scalar_records(ids, delta):
+        changed = delta != 0
+        records = np.empty(int(changed.sum()), dtype=SCALAR_DTYPE)
+        records["id"] = ids[changed]
+        records["delta"] = delta[changed]
+        return records
+
+
+class RemoteBubble: #lo mínimo que necesita MetaballRenderer para dibujar una burbuja
+
+    __slots__ = ("id", "position", "radius", "metaball_strength", "color")
+
+    def __init__(self, bubble_id, position, radius, metaball_strength, color):
+        self.id = bubble_id
+        self.position = position
+        self.radius = radius
+        self.metaball_strength = metaball_strength
+        self.color = color
+
+
+class StateDecoder: #reconstruye el estado a partir de los frames recibidos
+
+    def __init__(self):
+        self.frame = None
+        self.ids = np.empty(0, dtype=np.uint32)
+        self.values = np.empty((0, 4), dtype=np.int32)
+        self.colors = np.empty((0, 3), dtype=np.uint8)
+
+    def apply(self, payload):
+        magic, flags, frame, n_spawn, n_death, n_pos, n_rad, n_str = _HEADER.unpack_from(payload, 0)
+        if magic != MAGIC:
+            raise ValueError("Frame inválido: magic incorrecto")
+
+        offset = _HEADER.size
+        sections = []
+        for dtype, count in (
+            (SPAWN_DTYPE, n_spawn),
+            (DEATH_DTYPE, n_death),
+            (POSITION_DTYPE, n_pos),
+            (SCALAR_DTYPE, n_rad),
+            (SCALAR_DTYPE, n_str),
+        ):
+            sections.append(np.frombuffer(payload, dtype=dtype, count=count, offset=offset))
+            offset += dtype.itemsize * count
+        spawns, deaths, positions, radii, strengths = sections
+
+        if flags & FRAME_KEYFRAME:
+            self.ids = np.empty(0, dtype=np.uint32)
+            self.values = np.empty((0, 4), dtype=np.int32)
+            self.colors = np.empty((0, 3), dtype=np.uint8)
+        elif self.frame is None:
+            raise ValueError("Se recibió un frame delta antes del primer keyframe")
+
+        if len(deaths):
+            alive = ~np.isin(self.ids, deaths)
+            self.ids = self.ids[alive]
+            self.values = self.values[alive]
+            self.colors = self.colors[alive]
+
+        if len(positions) or len(radii) or len(strengths):
+            self.values = self.values.copy()
+            idx = np.searchsorted(self.ids, positions["id"])
+            self.values[idx, 0] += positions["dx"]
+            self.values[idx, 1] += positions["dy"]
+            self.values[np.searchsorted(self.ids, radii["id"]), 2] += radii["delta"]
+            self.values[np.searchsorted(self.ids, strengths["id"]), 3] += strengths["delta"]
+
+        if len(spawns):
+            new_values = np.stack(
+                [spawns["x"], spawns["y"], spawns["radius"], spawns["strength"]], axis=1
+            )
+            ids = np.concatenate([self.ids, spawns["id"]])
+            order = np.argsort(ids, kind="stable")
+            self.ids = ids[order]
+            self.values = np.concatenate([self.values, new_values])[order]
+            self.colors = np.concatenate([self.colors, spawns["color"]])[order]
+
+        self.frame = frame
+        return frame
+
+    def get_bubbles(self): #burbujas des-cuantizadas, listas para MetaballRenderer.render
+        values = self.values / _SCALES
+        colors = self.colors.astype(np.float32) / 255.0
+        return [
+            RemoteBubble(int(bubble_id), values[i, :2].copy(), values[i, 2], values[i, 3], colors[i])
+            for i, bubble_id in enumerate(self.ids)
+        ]
+
+
+class _ClientConnection: #cola de un solo slot: si el cliente es lento, se descartan frames intermedios
+
+    def __init__(self, writer, keyframe_interval):
+        self.writer = writer
+        self.encoder = DeltaEncoder(keyframe_interval)
+        self.pending = None
+        self.ready = asyncio.Event()
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+
+    def offer(self, snapshot):
+        if self.pending is not None:
+            self.frames_dropped += 1
+        self.pending = snapshot
+        self.ready.set()
+
+    async def run(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            snapshot, self.pending = self.pending, None
+
+            payload = self.encoder.encode(snapshot)
+            self.writer.write(_LENGTH.pack(len(payload)) + payload)
+            self.frames_sent += 1
+            self.bytes_sent += _LENGTH.size + len(payload)
+
+            #backpressure: mientras el buffer no se vacía, los nuevos snapshots pisan al pendiente
+            await self.writer.drain()
+
+
+class StateStreamServer: #transmite el estado de una BubbleSimulation a clientes TCP
+
+    def __init__(
+        self,
+        simulation,
+        host="127.0.0.1",
+        port=8765,
+        rate=30.0,
+        keyframe_interval=60,
+        max_buffer_bytes=256 * 1024,
+    ):
+        self.simulation = simulation
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.keyframe_interval = keyframe_interval
+        self.max_buffer_bytes = max_buffer_bytes
+
+        self.frame = 0
+        self.clients = set()
+        self._handlers = set()  #tareas de _handle_client, para cancelarlas en stop()
+        self._server = None
+        self._broadcast_task = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  #por si se pidió el puerto 0
+        self._broadcast_task = asyncio.create_task(self._broadcast_loop())
+
+    async def stop(self):
+        if self._broadcast_task is not None:
+            self._broadcast_task.cancel()
+            try:
+                await self._broadcast_task
+            except asyncio.CancelledError:
+                pass
+            self._broadcast_task = None
+        if self._server is not None:
+            self._server.close()
+            #cancelar y esperar a los handlers antes de wait_closed: si no, quedan tareas
+            #pendientes al cerrar el loop y se imprime el CancelledError
+            handlers = list(self._handlers)
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def publish(self): #toma un snapshot y lo ofrece a todos los clientes
+        self.frame += 1
+        if not self.clients:
+            return
+        snapshot = capture_state(self.simulation.bubbles, self.frame)
+        for client in self.clients:
+            client.offer(snapshot)
+
+    async def _broadcast_loop(self):
+        interval = 1.0 / self.rate
+        while True:
+            self.publish()
+            await asyncio.sleep(interval)
+
+    async def _handle_client(self, reader, writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        writer.transport.set_write_buffer_limits(high=self.max_buffer_bytes)
+        client = _ClientConnection(writer, self.keyframe_interval)
+        self.clients.add(client)
+
+        sender = asyncio.create_task(client.run())
+        closed = asyncio.create_task(reader.read())  #los clientes no envían nada, solo esperamos EOF
+        try:
+            await asyncio.wait({sender, closed}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            #lo cancela stop(); terminar normalmente, porque en 3.11 asyncio.streams llama
+            #task.exception() sobre el handler y una tarea cancelada imprime el traceback
+            pass
+        finally:
+            self.clients.discard(client)
+            for task in (sender, closed):
+                task.cancel()
+            await asyncio.gather(sender, closed, return_exceptions=True)
+            writer.close()
+            self._handlers.discard(handler)
+
+    def get_stats(self): #estadísticas de la transmisión
+        return {
+            'clientes': len(self.clients),
+            'frame': self.frame,
+            'frames enviados': sum(c.frames_sent for c in self.clients),
+            'frames descartados': sum(c.frames_dropped for c in self.clients),
+            'bytes enviados': sum(c.bytes_sent for c in self.clients),
+        }
+
+
+class StateStreamClient: #se conecta a un StateStreamServer y reconstruye el estado
+
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.host = host
+        self.port = port
+        self.decoder = StateDecoder()
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def receive_frame(self): #espera y aplica el siguiente frame, retorna su número
+        (length,) = _LENGTH.unpack(await self.reader.readexactly(_LENGTH.size))
+        payload = await self.reader.readexactly(length)
+        return self.decoder.apply(payload)
+
+    async def run(self, on_frame=None): #recibe frames hasta que el servidor cierre la conexión
+        try:
+            while True:
+                frame = await self.receive_frame()
+                if on_frame is not None:
+                    on_frame(self, frame)
+        except asyncio.IncompleteReadError:
+            pass
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.writer = None
+
+    @property
+    def bubbles(self):
+        return self.decoder.get_bubbles()
+
+
+def serve_headless(width=1200, height=800, host="0.0.0.0", port=8765, rate=30.0, sim_fps=60, initial_bubbles=12, seed=None, physics="python"):
+    #corre la simulación sin ventana y la transmite (bubble_simulator --serve)
+    from .simulation import BubbleSimulation
+
+    async def main():
+        simulation = BubbleSimulation(width, height, seed=seed, physics=physics)
+        for _ in range(initial_bubbles):
+            simulation.add_bubble()
+
+        server = StateStreamServer(simulation, host, port, rate)
+        await server.start()
+        print(f"Transmitiendo simulación en {host}:{server.port}")
+
+        dt = 1.0 / sim_fps
+        next_tick = time.perf_counter()
+        try:
+            while True:
+                simulation.update(dt)
+                next_tick += dt
+                await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt: #asyncio.run ya canceló main y cerró el servidor
+        print("Transmisión detenida")
+
+
+def run_viewer(host="127.0.0.1", port=8765, width=1200, height=800):
+    #ventana que dibuja el estado recibido de un servidor remoto (bubble_simulator --connect)
+    import pyglet
+    from .renderer import MetaballRenderer
+
+    window = pyglet.window.Window(width, height, caption="Metaball Bubble Viewer")
+    renderer = MetaballRenderer(width, height)
+    client = StateStreamClient(host, port)
+
+    lock = threading.Lock()
+    latest = []
+
+    def on_frame(client, frame):
+        bubbles = client.bubbles
+        with lock:
+            latest[:] = bubbles
+
+    def network_thread():
+        async def main():
+            await client.connect()
+            await client.run(on_frame)
+        asyncio.run(main())
+
+    threading.Thread(target=network_thread, daemon=True).start()
+    start_time = time.time()
+
+    @window.event
+    def on_draw():
+        window.clear()
+        with lock:
+            bubbles = list(latest)
+        renderer.render(bubbles, time.time() - start_time)
+
+    pyglet.clock.schedule_interval(lambda dt: None, 1 / 60)
+    pyglet.app.run()
@@ -0,0 +1,11 @@
+import sys
+import types
+from pathlib import Path
+
+
+#el repo es el paquete mismo: se registra como bubble_simulator (sin correr su __init__,
+#que arma la app de pyglet) para que los tests importen los módulos sin ventana
+if "bubble_simulator" not in sys.modules:
+    package = types.ModuleType("bubble_simulator")
+    package.__path__ = [str(Path(__file__).resolve().parent.parent)]
+    sys.modules["bubble_simulator"] = package
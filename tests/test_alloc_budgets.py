@@ -0,0 +1,8 @@
+import pytest
+
+from bubble_simulator.alloc_profile import DEFAULT_BUDGETS, STANDARD_SCENARIOS, assert_allocation_budgets
+
+
+@pytest.mark.parametrize("scenario", STANDARD_SCENARIOS)
+def test_allocation_budgets(scenario): #falla si alguna etapa supera su presupuesto de bytes por frame
+    assert_allocation_budgets({scenario: DEFAULT_BUDGETS[scenario]})
@@ -0,0 +1,87 @@
+import struct
+
+import numpy as np
+import pytest
+
+from bubble_simulator.input_trace import TRACE_VERSION, InputRecorder, InputTrace, replay_trace, state_digest
+from bubble_simulator.interaction import InteractionController
+from bubble_simulator.quality_governor import QualityGovernor
+from bubble_simulator.simulation import BubbleSimulation
+
+
+def record_session(path, offscreen_interval=1): #sesión sin ventana con los mismos eventos que la app
+    simulation = BubbleSimulation(2400, 1600, seed=11)
+    simulation.offscreen_interval = offscreen_interval
+    recorder = InputRecorder(simulation)
+    controller = InteractionController(simulation, recorder, verbose=False)
+    governor = QualityGovernor(simulation)
+    governor.on_change = lambda level: recorder.record("quality", controller.frame_count, arg=level)
+    controller.add_initial_bubbles()
+
+    dt = 1.0 / 60
+    for frame in range(240):
+        controller.set_focus((0.0, 0.0, 1200.0, 800.0) if frame < 120 else (600.0, 400.0, 1800.0, 1200.0))
+        if frame == 10:
+            controller.mouse_motion(400.0, 300.0)
+            controller.mouse_press(400.0, 300.0, "LEFT")
+        if 11 <= frame < 30:
+            controller.mouse_drag(400.0 + 5 * frame, 300.0, {"LEFT"})
+        if frame == 30:
+            controller.mouse_release(500.0, 300.0, "LEFT")
+            controller.mouse_press(900.0, 500.0, "RIGHT")
+            controller.mouse_release(900.0, 500.0, "RIGHT")
+        if frame == 50:
+            controller.key_press("E", 700.0, 450.0)
+        if frame == 60:
+            controller.key_press("UP")
+            controller.key_press("SPACE")
+        if frame == 80:
+            governor.set_level(6)
+        if frame == 150:
+            governor.set_level(2)
+        if frame == 160:
+            controller.key_press("C")
+        if frame == 200:
+            controller.key_press("SPACE")
+        #vacío tras C: la app pasa a reposo y simula el dt real a 4 Hz
+        if 160 <= frame < 200:
+            controller.update(0.25, catch_up=True)
+        else:
+            controller.update(dt)
+
+    recorder.save(path)
+    return simulation
+
+
+def test_replay_matches_recorded_session(tmp_path):
+    path = str(tmp_path / "sesion.bstr")
+    simulation = record_session(path)
+    trace = InputTrace.load(path)
+    assert trace.get_frame_count() == 240
+    kinds = set(trace.events["kind"].tolist())
+    assert len(kinds) == 8 #todos los tipos de evento
+    assert simulation.bubbles
+    assert state_digest(replay_trace(trace)) == state_digest(simulation)
+
+
+def test_replay_matches_with_offscreen_interval(tmp_path):
+    path = str(tmp_path / "sesion.bstr")
+    simulation = record_session(path, offscreen_interval=3)
+    replayed = replay_trace(path)
+    assert replayed.offscreen_interval == 3
+    assert state_digest(replayed) == state_digest(simulation)
+    assert len(simulation.bubbles) == len(replayed.bubbles)
+    assert np.allclose(
+        [b.position for b in simulation.bubbles],
+        [b.position for b in replayed.bubbles],
+    )
+
+
+def test_load_rejects_other_versions(tmp_path):
+    path = str(tmp_path / "vieja.bstr")
+    InputTrace(0, 1200, 800).save(path)
+    with open(path, "r+b") as f: #el byte de versión va después del magic
+        f.seek(4)
+        f.write(struct.pack("<B", TRACE_VERSION - 1))
+    with pytest.raises(ValueError):
+        InputTrace.load(path)
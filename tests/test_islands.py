@@ -0,0 +1,50 @@
+import numpy as np
+
+from bubble_simulator.simulation import BubbleSimulation
+
+
+def packed_cluster(physics="numpy"): #125 burbujas en contacto, quietas, con el mouse lejos
+    simulation = BubbleSimulation(1200, 800, seed=1, physics=physics)
+    simulation.spawn_rate = 0.0
+    grid = np.stack(np.meshgrid(np.arange(25), np.arange(5)), axis=-1).reshape(-1, 2)
+    simulation.spawn_bubbles(positions=grid * 38.0 + [150, 300], speeds=0.0, radii=20.0, lifetimes=1000.0)
+    simulation.update_mouse_position(-5000, -5000)
+    return simulation
+
+
+def test_find_islands_groups_touching_bubbles():
+    simulation = BubbleSimulation(1200, 800, seed=0)
+    #una cadena de 3 (en desorden), un par y una suelta
+    for x, y in ((100, 100), (300, 100), (138, 100), (176, 100), (338, 100), (600, 600)):
+        simulation.add_bubble(x, y, radius=20.0)
+    labels = simulation.find_islands()
+    assert labels[0] == labels[2] == labels[3]
+    assert labels[1] == labels[4]
+    assert len(set(labels.tolist())) == 3
+
+
+def test_drifting_cluster_falls_asleep_and_drifts():
+    simulation = packed_cluster()
+    dt = 1.0 / 60
+    for _ in range(90): #sleep_delay es 1 s, y el primer cambio de viento llega a los 2 s
+        simulation.update(dt)
+    assert all(b.sleeping for b in simulation.bubbles)
+
+    #dormida no se simula, pero la isla sigue derivando con el viento
+    before = np.array([b.position for b in simulation.bubbles])
+    simulation.update(dt)
+    moved = np.array([b.position for b in simulation.bubbles]) - before
+    assert np.abs(moved).max() > 0
+    assert np.allclose(moved, moved[0])
+
+
+def test_mouse_wakes_sleeping_island():
+    simulation = packed_cluster()
+    dt = 1.0 / 60
+    for _ in range(90):
+        simulation.update(dt)
+    center = np.mean([b.position for b in simulation.bubbles], axis=0)
+    simulation.update_mouse_position(*center)
+    for _ in range(simulation.island_interval):
+        simulation.update(dt)
+    assert not any(b.sleeping for b in simulation.bubbles)
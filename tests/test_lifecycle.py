@@ -0,0 +1,93 @@
+import numpy as np
+
+from bubble_simulator.bubble_agent import Bubble
+from bubble_simulator.lifecycle import SPLIT_COOLDOWN, LifecycleScheduler
+from bubble_simulator.simulation import BubbleSimulation
+
+
+def make_bubble(lifetime=100.0, age=0.0):
+    bubble = Bubble(20.0, np.zeros(2), np.zeros(2), lifetime=lifetime)
+    bubble.age = age
+    return bubble
+
+
+class CountingDict(dict): #cuenta cuántas claves se recorren
+    visited = 0
+
+    def __iter__(self):
+        for key in dict.__iter__(self):
+            self.visited += 1
+            yield key
+
+
+def test_bubbles_expire_in_order_of_their_deadline():
+    scheduler = LifecycleScheduler()
+    bubbles = [make_bubble(lifetime) for lifetime in (5.0, 2.0, 8.0, 3.0)]
+    for bubble in bubbles:
+        scheduler.add(bubble)
+
+    expired = []
+    for _ in range(100):
+        expired.extend((round(scheduler.time, 1), b.lifetime) for b in scheduler.advance(0.1))
+    assert [lifetime for _, lifetime in expired] == [2.0, 3.0, 5.0, 8.0]
+    assert all(abs(when - lifetime) < 0.11 for when, lifetime in expired)
+    assert len(scheduler) == 0
+
+
+def test_evict_takes_the_oldest_without_scanning_everything():
+    scheduler = LifecycleScheduler()
+    bubbles = [make_bubble() for _ in range(1000)]
+    for bubble in bubbles:
+        scheduler.add(bubble)
+        scheduler.advance(0.01)
+    scheduler.by_age = CountingDict(scheduler.by_age)
+
+    evicted = scheduler.evict(3)
+    assert evicted == bubbles[:3]
+    assert scheduler.by_age.visited <= 3
+    assert len(scheduler) == 997
+    assert next(iter(scheduler.by_age)) == bubbles[3].id
+
+
+def test_split_cooldown():
+    scheduler = LifecycleScheduler()
+    bubble = make_bubble()
+    scheduler.add(bubble)
+    scheduler.advance(SPLIT_COOLDOWN - 0.1)
+    assert not bubble.can_split
+    scheduler.advance(0.2)
+    assert bubble.can_split
+
+    scheduler.on_split(bubble)
+    assert not bubble.can_split
+    scheduler.advance(SPLIT_COOLDOWN - 0.1)
+    assert not bubble.can_split
+    scheduler.advance(0.2)
+    assert bubble.can_split
+
+
+def test_sync_detects_replaced_bubbles_and_keeps_cooldowns():
+    simulation = BubbleSimulation(1200, 800, seed=0)
+    simulation.spawn_rate = 0.0
+    simulation.spawn_pattern("scatter", 10)
+    for _ in range(150): #más que la espera inicial: ya pueden dividirse
+        simulation.update(1.0 / 60)
+    cooling = simulation.bubbles[0]
+    simulation.lifecycle.on_split(cooling)
+
+    #reemplazo por fuera de la API: mismo largo, otra burbuja
+    replaced = simulation.bubbles[1]
+    newcomer = make_bubble(lifetime=0.5)
+    simulation.bubbles[1] = newcomer
+    simulation.update(1.0 / 60)
+
+    assert simulation.lifecycle.is_synced(simulation.bubbles)
+    assert replaced.id not in simulation.lifecycle.by_age
+    assert not cooling.can_split #la espera tras dividirse no se reinicia
+
+    for _ in range(60): #la nueva expira por edad
+        simulation.update(1.0 / 60)
+    assert newcomer not in simulation.bubbles
+
+    ids = {b.id for b in simulation.bubbles}
+    assert {b.id for b in simulation.lifecycle.evict(3)} <= ids
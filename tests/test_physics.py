@@ -0,0 +1,20 @@
+from bubble_simulator.physics import compare_backends
+
+
+def test_same_backend_does_not_diverge():
+    for backend, scenario in (("python", "calma"), ("numpy", "densa")):
+        report = compare_backends(backend, backend, scenario, frames=120)
+        assert report['primer frame divergente'] is None
+        assert report['posición máx'] == 0.0
+        assert report['velocidad máx'] == 0.0
+        assert report['sin pareja máx'] == 0
+
+
+def test_python_and_numpy_match_without_collisions():
+    #sin choques la única diferencia es el orden de las operaciones de punto flotante
+    for scenario in ("calma", "densa", "explosiones"):
+        report = compare_backends("python", "numpy", scenario, frames=120, tolerance=1e-9, collide=False)
+        assert report['primer frame divergente'] is None
+        assert report['posición máx'] < 1e-9
+        assert report['velocidad máx'] < 1e-9
+        assert report['sin pareja máx'] == 0
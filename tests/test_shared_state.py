@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from bubble_simulator.shared_state import SharedStateReader, SharedStateWriter, get_layout, ALIGNMENT, HEADER_SIZE
+from bubble_simulator.simulation import BubbleSimulation
+
+
+@pytest.fixture
+def segment(): #escritor y un lector sobre otro mapeo del mismo segmento
+    writer = SharedStateWriter(capacity=64)
+    reader = SharedStateReader(writer.name)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def test_layout_is_aligned():
+    offsets, size = get_layout(100)
+    assert min(offsets.values()) == HEADER_SIZE
+    assert all(offset % ALIGNMENT == 0 for offset in offsets.values())
+    assert size % ALIGNMENT == 0
+
+
+def test_reader_sees_published_bubbles(segment):
+    writer, reader = segment
+    simulation = BubbleSimulation(1200, 800, seed=0)
+    simulation.spawn_pattern("scatter", 20)
+    simulation.update(1.0 / 60)
+    writer.publish(simulation.bubbles, simulation.frame_index)
+
+    frame, arrays = reader.snapshot()
+    bubbles = simulation.bubbles
+    assert frame == simulation.frame_index
+    assert len(arrays["ids"]) == len(bubbles)
+    assert arrays["ids"].tolist() == [b.id for b in bubbles]
+    assert np.allclose(arrays["positions"], [b.position for b in bubbles], rtol=1e-6)
+    assert np.allclose(arrays["speeds"], [b.speed for b in bubbles], rtol=1e-6)
+    assert np.allclose(arrays["radii"], [b.radius for b in bubbles], rtol=1e-6)
+    assert np.allclose(arrays["strengths"], [b.metaball_strength for b in bubbles], rtol=1e-6)
+    assert np.allclose(arrays["colors"], [b.color for b in bubbles])
+
+    #los arrays se truncan a capacity
+    simulation.spawn_pattern("scatter", 100)
+    writer.publish(simulation.bubbles)
+    frame, arrays = reader.snapshot()
+    assert frame == simulation.frame_index + 1
+    assert len(arrays["ids"]) == writer.capacity
+
+
+def test_read_retries_when_a_write_overlaps(segment):
+    writer, reader = segment
+    simulation = BubbleSimulation(1200, 800, seed=0)
+    simulation.spawn_pattern("scatter", 5)
+    writer.publish(simulation.bubbles)
+
+    calls = []
+
+    def consumer(frame, views):
+        calls.append(frame)
+        if len(calls) == 1: #el escritor publica mientras se lee
+            writer.publish(simulation.bubbles)
+        return frame
+
+    assert reader.read(consumer) == 2
+    assert calls == [1, 2]
+
+
+def test_read_times_out_while_seq_is_odd(segment):
+    writer, reader = segment
+    writer.publish([])
+    writer.header["seq"] += 1 #escritura que nunca termina
+
+    calls = []
+    with pytest.raises(TimeoutError):
+        reader.read(calls.append, timeout=0.05)
+    assert calls == []
+
+
+def test_failed_publish_leaves_seq_even(segment):
+    writer, reader = segment
+    simulation = BubbleSimulation(1200, 800, seed=0)
+    simulation.spawn_pattern("scatter", 5)
+    writer.publish(simulation.bubbles)
+
+    simulation.bubbles[2].position = None
+    with pytest.raises((TypeError, ValueError)):
+        writer.publish(simulation.bubbles)
+    assert int(writer.header["seq"]) % 2 == 0
+    frame, arrays = reader.snapshot(timeout=0.05)
+    assert len(arrays["ids"]) == 0
@@ -0,0 +1,155 @@
+import asyncio
+import socket
+
+import numpy as np
+
+from bubble_simulator.simulation import BubbleSimulation
+from bubble_simulator.streaming import (
+    FRAME_KEYFRAME,
+    POSITION_SCALE,
+    DeltaEncoder,
+    StateDecoder,
+    StateStreamClient,
+    StateStreamServer,
+    _HEADER,
+    capture_state,
+)
+
+
+def make_simulation(count=20, seed=0):
+    simulation = BubbleSimulation(1200, 800, seed=seed)
+    simulation.spawn_rate = 0.0
+    simulation.spawn_pattern("scatter", count)
+    return simulation
+
+
+def header(payload): #(flags, frame, spawns, muertes, posiciones, radios, fuerzas)
+    return _HEADER.unpack_from(payload, 0)[1:]
+
+
+def assert_matches(decoder, simulation, frame=None): #el estado decodificado es el cuantizado de la simulación
+    snapshot = capture_state(simulation.bubbles, frame or 0)
+    assert np.array_equal(decoder.ids, snapshot.ids)
+    assert np.array_equal(decoder.values, snapshot.values)
+    assert np.array_equal(decoder.colors, snapshot.colors)
+
+    by_id = {b.id: b for b in simulation.bubbles}
+    for remote in decoder.get_bubbles():
+        bubble = by_id[remote.id]
+        assert np.abs(remote.position - bubble.position).max() <= 0.5 / POSITION_SCALE
+        assert abs(remote.radius - bubble.radius) <= 0.5 / 64.0
+
+
+def run(coroutine): #los tests no deben quedar colgados si algo no llega
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=20))
+
+
+def test_delta_frames_track_spawns_deaths_and_moves():
+    simulation = make_simulation()
+    encoder = DeltaEncoder(keyframe_interval=1000)
+    decoder = StateDecoder()
+
+    payload = encoder.encode(capture_state(simulation.bubbles, 1))
+    assert header(payload)[0] & FRAME_KEYFRAME
+    decoder.apply(payload)
+    assert_matches(decoder, simulation)
+
+    for frame in range(2, 40):
+        simulation.update(1.0 / 60)
+        if frame == 10:
+            simulation.spawn_pattern("ring", 6, center=(600, 400))
+        if frame == 20:
+            killed = simulation.bubbles[:5]
+            simulation.bubbles = simulation.bubbles[5:]
+        payload = encoder.encode(capture_state(simulation.bubbles, frame))
+        flags, _, spawns, deaths, positions, _, _ = header(payload)
+        assert not flags & FRAME_KEYFRAME
+        assert positions > 0
+        if frame == 10:
+            assert spawns == 6
+        if frame == 20:
+            assert deaths >= 5
+        decoder.apply(payload)
+        assert_matches(decoder, simulation)
+    assert not set(decoder.ids.tolist()) & {b.id for b in killed}
+
+
+def test_keyframes_reset_the_decoder():
+    simulation = make_simulation()
+    encoder = DeltaEncoder(keyframe_interval=5)
+    decoder = StateDecoder()
+
+    flags = []
+    for frame in range(1, 16):
+        simulation.update(1.0 / 60)
+        payload = encoder.encode(capture_state(simulation.bubbles, frame))
+        flags.append(bool(header(payload)[0] & FRAME_KEYFRAME))
+        if frame == 8: #estado corrupto: el próximo keyframe lo reemplaza entero
+            decoder.values = decoder.values + 1000
+        decoder.apply(payload)
+    assert flags == [True, False, False, False, False] * 3
+    assert_matches(decoder, simulation)
+
+
+def test_server_streams_to_client_over_localhost():
+    async def main():
+        simulation = make_simulation()
+        #rate muy bajo: los frames los publica el test
+        server = StateStreamServer(simulation, port=0, rate=1e-3, keyframe_interval=10)
+        await server.start()
+        client = StateStreamClient(port=server.port)
+        await client.connect()
+        try:
+            while not server.clients:
+                await asyncio.sleep(0.01)
+            for step in range(30):
+                simulation.update(1.0 / 60)
+                if step == 5:
+                    simulation.spawn_pattern("ring", 4, center=(300, 300))
+                if step == 15:
+                    simulation.bubbles = simulation.bubbles[3:]
+                server.publish()
+                assert await client.receive_frame() == server.frame
+                assert_matches(client.decoder, simulation)
+        finally:
+            await client.close()
+            await server.stop()
+
+    run(main())
+
+
+def test_slow_client_drops_frames_and_converges():
+    async def main():
+        simulation = make_simulation(count=400)
+        server = StateStreamServer(simulation, port=0, rate=1e-3, keyframe_interval=1, max_buffer_bytes=1024)
+        await server.start()
+        #buffer de recepción chico desde antes de conectar, para que el envío se atasque
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", server.port))
+        client = StateStreamClient(port=server.port)
+        client.reader, client.writer = await asyncio.open_connection(sock=sock)
+        try:
+            while not server.clients:
+                await asyncio.sleep(0.01)
+            connection = next(iter(server.clients))
+            connection.writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+
+            #el cliente no lee mientras el servidor publica: el slot pendiente se pisa
+            for _ in range(60):
+                simulation.update(1.0 / 60)
+                server.publish()
+                await asyncio.sleep(0)
+            assert connection.frames_dropped > 0
+
+            frame = None
+            while frame != server.frame:
+                frame = await client.receive_frame()
+            assert_matches(client.decoder, simulation)
+            assert connection.frames_sent + connection.frames_dropped == server.frame - 1
+        finally:
+            await client.close()
+            await server.stop()
+
+    run(main())
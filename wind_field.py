@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class WindField: #campo de viento variable en el espacio, guardado en una grilla gruesa
+    #el campo es el rotor (curl) de un potencial suave aleatorio, así que no tiene
+    #divergencia: produce remolinos en vez de fuentes o sumideros. Cada `period`
+    #segundos se genera un campo nuevo y se hace un cross-fade hacia él, y todo el
+    #patrón es arrastrado (advectado) por el viento global. La grilla es periódica.
+
+    def __init__(self, width, height, cell_size=100.0, strength=25.0, period=4.0, smoothing=3):
+        self.cell_size = cell_size
+        self.strength = strength
+        self.period = period
+        self.smoothing = smoothing
+        self.cols = max(2, int(np.ceil(width / cell_size)))
+        self.rows = max(2, int(np.ceil(height / cell_size)))
+
+        self.current = self._generate()
+        self.target = self._generate()
+        self.blend = 0.0
+        self.offset = np.zeros(2)
+        self.field = self.current.copy() #(rows, cols, 2), mezcla actual de current y target
+
+    def _generate(self): #campo de rotor normalizado (magnitud máxima 1)
+        potential = np.random.random((self.rows, self.cols))
+        for _ in range(self.smoothing): #suavizado periódico con los 4 vecinos
+            potential = (
+                potential
+                + np.roll(potential, 1, axis=0)
+                + np.roll(potential, -1, axis=0)
+                + np.roll(potential, 1, axis=1)
+                + np.roll(potential, -1, axis=1)
+            ) / 5.0
+
+        #v = (dψ/dy, -dψ/dx) con diferencias centrales
+        dpsi_dy = (np.roll(potential, -1, axis=0) - np.roll(potential, 1, axis=0)) * 0.5
+        dpsi_dx = (np.roll(potential, -1, axis=1) - np.roll(potential, 1, axis=1)) * 0.5
+        field = np.stack([dpsi_dy, -dpsi_dx], axis=-1)
+        return field / max(np.abs(field).max(), 1e-9)
+
+    def update(self, dt, advect_velocity=None): #avanza el cross-fade y la advección
+        self.blend += dt / self.period
+        if self.blend >= 1.0:
+            self.current = self.target
+            self.target = self._generate()
+            self.blend = 0.0
+        #grilla chica: mezclarla entera es más barato que muestrear dos campos
+        np.multiply(self.current, 1.0 - self.blend, out=self.field)
+        self.field += self.target * self.blend
+
+        if advect_velocity is not None:
+            self.offset += np.asarray(advect_velocity, dtype=float) * dt
+
+    def sample(self, positions): #interpolación bilineal vectorizada, positions (N, 2) -> (N, 2)
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        gx = (positions[:, 0] - self.offset[0]) / self.cell_size
+        gy = (positions[:, 1] - self.offset[1]) / self.cell_size
+
+        x0 = np.floor(gx)
+        y0 = np.floor(gy)
+        fx = (gx - x0)[:, None]
+        fy = (gy - y0)[:, None]
+        x0 = x0.astype(np.intp) % self.cols
+        y0 = y0.astype(np.intp) % self.rows
+        x1 = (x0 + 1) % self.cols
+        y1 = (y0 + 1) % self.rows
+
+        field = self.field
+        bottom = field[y0, x0] * (1.0 - fx) + field[y0, x1] * fx
+        top = field[y1, x0] * (1.0 - fx) + field[y1, x1] * fx
+        return (bottom * (1.0 - fy) + top * fy) * self.strength